@@ -0,0 +1 @@
+"""Lets plain ``pytest`` at the repo root import ``sim``, like ``python -m sim``."""
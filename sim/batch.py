@@ -0,0 +1,239 @@
+"""Block-vectorized mission simulation.
+
+Produces the same state histories as the per-step model loop in ``main.py``,
+but works out whole blocks of time-steps as arrays. Everything except the
+``SpeedControl``/``Traversal`` feedback is a closed-form function of time and
+distance along the path. That feedback is solved a block at a time: guess the
+distances for the block, run the controller over all of them at once and
+correct the guess with Newton's method until every step satisfies the same
+recurrence the per-step loop integrates. Blocks grow while this converges and
+shrink when it doesn't.
+"""
+
+from types import SimpleNamespace
+
+import numpy as np
+
+from .utils import snap_angle_range
+from .paths import Path
+from .mercury import Terminator, Sun, SurfaceThermal, surface_temp, surface_temp_slope
+from .traversal import SpeedControl
+from .power import Power
+from .thermal import LumpedThermal
+from .recorder import Recorder
+from .recurrence import MIN_BLOCK, MAX_ITERS, next_block, solve_linear_recurrence
+
+DIST_TOL = 1e-9  # [km], Max residual for a step to count as solved
+STALL = 0.5  # Give up on a block once its residual shrinks by less than this
+STALL_BLOCK = 1 << 12  # Smaller blocks cost less to finish than to restart
+RECORD_BLOCK = 1 << 16  # [steps], Post-processed and recorded at a time
+
+
+def _phi_at(path: Path, dists: np.ndarray, term_lon: np.ndarray) -> np.ndarray:
+    """Subsolar angle [deg] at distance(s) along the path and terminator lon."""
+    return snap_angle_range(90 - (path.lons_at_dists(dists) - term_lon))
+
+
+def _speed_after(path, dists, term_lon, r):
+    """Commanded speed [m/s] for the step after being at ``dists``.
+
+    ``r`` [AU] is the Sun distance at the time of that next step. Also has
+    what went into the speed, for ``_speed_slope``.
+    """
+    lons, lon_slopes = path.lons_and_slopes_at_dists(dists)
+    phis = snap_angle_range(90 - (lons - term_lon))
+    surf_temps = surface_temp(phis, r)
+    temps_max = SpeedControl.target_temps_max(dists)
+    return SimpleNamespace(
+        speed=SpeedControl.speed_from_temp(surf_temps, temps_max),
+        phi=phis,
+        surf_temp=surf_temps,
+        temp_max=temps_max,
+        lon_slope=lon_slopes,
+    )
+
+
+def _speed_slope(after) -> np.ndarray:
+    """Rate of change [m/s/km] with distance of the speeds from ``_speed_after``."""
+    return (
+        SpeedControl.speed_slope_from_temp(after.surf_temp, after.temp_max)
+        * surface_temp_slope(after.phi, after.surf_temp)
+        # phi falls as the longitude grows
+        * -after.lon_slope
+    )
+
+
+def _solve_block(path, dt, i0, dist0, speed0, n):
+    """Solve the speed/traversal feedback for steps i0+1 .. i0+n.
+
+    Step i moves at the speed commanded from the state at step i-1:
+    ``dist[i] = dist[i-1] + dt * speed(dist[i-1], t[i-1])``. Newton's method
+    on the whole block turns each update into a linear recurrence, and a step
+    is accepted once its residual in that equation is below ``DIST_TOL``.
+    Returns the number of accepted steps and the per-step arrays for them.
+    """
+    h = 1e-3 * dt
+    ks = np.arange(n)
+    prev_term_lon = Terminator.longitude_at(path, (i0 + ks) * dt)
+    r = SurfaceThermal.sun_distance((i0 + ks + 1) * dt)
+    dists = dist0 + h * speed0 * (ks + 1)
+    last = np.inf
+    for _ in range(MAX_ITERS):
+        prev_dists = np.concatenate(([dist0], dists[:-1]))
+        after = _speed_after(path, prev_dists, prev_term_lon, r)
+        resid = prev_dists + h * after.speed - dists
+        bad = np.flatnonzero(~(np.abs(resid) <= DIST_TOL))
+        n_ok = bad[0] if bad.size else n
+        if n_ok == n:
+            break
+        # Newton stalls at the kinks of the controller's clipping, so once it
+        # stops converging keep the solved steps and start again after them
+        worst = np.max(np.abs(resid))
+        if n_ok and n > STALL_BLOCK and worst > STALL * last:
+            break
+        last = worst
+        dists += solve_linear_recurrence(1 + h * _speed_slope(after), resid)
+
+    # The first step only depends on the known state so is always solved
+    n_ok = max(n_ok, 1)
+    return n_ok, SimpleNamespace(
+        dist=prev_dists[:n_ok] + h * after.speed[:n_ok],
+        speed=after.speed[:n_ok],
+        surf_temp=after.surf_temp[:n_ok],
+        term_lon=prev_term_lon[:n_ok] + Terminator.SPEED * dt,
+    )
+
+
+def _replay(path, dt, schedule):
+    """Per-step arrays of following a planned speed schedule.
+
+    The schedule never asks for more than MAX_SPEED, so each step lands on
+    its planned distance and there is no feedback to solve.
+    """
+    total = path.total_distance()
+    t = np.arange(int(np.ceil(schedule.t[-1] / dt)) + 1) * dt
+    # Up to and including the first step at the end, as in the loop
+    t = t[: np.searchsorted(schedule.dist_at(t), total) + 1]
+    dist = schedule.dist_at(t)
+    term_lon = Terminator.longitude_at(path, t)
+    prev_dist = np.concatenate(([0.0], dist[:-1]))
+    prev_term_lon = np.concatenate(([term_lon[0]], term_lon[:-1]))
+    speed = np.concatenate(([0.0], np.diff(dist) / (1e-3 * dt)))
+    surf_temp = surface_temp(
+        _phi_at(path, prev_dist, prev_term_lon), SurfaceThermal.sun_distance(t)
+    )
+    return SimpleNamespace(
+        dist=dist, speed=speed, surf_temp=surf_temp, term_lon=term_lon
+    )
+
+
+def _solve_feedback(path, dt):
+    """Per-step arrays of the speed/traversal feedback over the whole path."""
+    total = path.total_distance()
+    term_lon0 = Terminator.initial_longitude(path)
+    blocks = [
+        SimpleNamespace(
+            dist=np.array([0.0]),
+            speed=np.array([0.0]),
+            surf_temp=np.atleast_1d(
+                surface_temp(
+                    _phi_at(path, 0.0, term_lon0), SurfaceThermal.sun_distance(0.0)
+                )
+            ),
+            term_lon=np.array([term_lon0]),
+        )
+    ]
+
+    i, dist, speed = 0, 0.0, 0.0
+    n = MIN_BLOCK
+    while dist < total:
+        n_ok, block = _solve_block(path, dt, i, dist, speed, n)
+        done = np.flatnonzero(block.dist >= total)
+        if done.size:
+            n_ok = done[0] + 1
+            block = SimpleNamespace(**{k: v[:n_ok] for k, v in vars(block).items()})
+        blocks.append(block)
+        i += n_ok
+        dist, speed = block.dist[-1], block.speed[-1]
+        n = next_block(n, n_ok)
+
+    return SimpleNamespace(
+        **{k: np.concatenate([getattr(b, k) for b in blocks]) for k in vars(blocks[0])}
+    )
+
+
+def _record(rec, path, dt, i, res, thermal, temps):
+    """Record the steps from i of the feedback solution ``res``.
+
+    Everything downstream of the feedback loop is closed-form, apart from
+    the body and panel temps, which carry on from ``temps``. Returns the
+    body and panel temps of the last step.
+    """
+    block = SimpleNamespace(
+        **{k: v[i : i + RECORD_BLOCK] for k, v in vars(res).items()}
+    )
+    t = (i + np.arange(len(block.dist))) * dt
+    t_excess = (1 - block.speed / SpeedControl.MAX_SPEED) * dt
+    if i == 0:
+        t_excess[0] = 0
+
+    lat, lon, xyz, bearing = path.points_at_dists(block.dist)
+    alpha = snap_angle_range(lon - block.term_lon)
+    sun_azimuth = snap_angle_range(90 - bearing)
+    sun_vec = Sun.sun_vectors(sun_azimuth, alpha)
+    if thermal:
+        body_temp, panel_temp = LumpedThermal.integrate(
+            sun_vec, block.surf_temp, dt, t, initial=temps
+        )
+    else:
+        body_temp = panel_temp = np.full(len(t), np.nan)
+
+    rec.extend(
+        t=t,
+        dist=block.dist,
+        lat=lat,
+        lon=lon,
+        x=xyz[0],
+        y=xyz[1],
+        z=xyz[2],
+        speed=block.speed,
+        t_excess=t_excess,
+        bearing=bearing,
+        term_lon=block.term_lon,
+        phi=snap_angle_range(90 - alpha),
+        surf_temp=block.surf_temp,
+        sun_elevation=alpha,
+        sun_azimuth=sun_azimuth,
+        power_gen=Power.GEN_EFFICIENCY * Power.received_from_sun(sun_vec, t),
+        body_temp=body_temp,
+        panel_temp=panel_temp,
+    )
+    return body_temp[-1], panel_temp[-1]
+
+
+def simulate(
+    path: Path,
+    dt: float,
+    schedule=None,
+    thermal: bool = False,
+    rec: Recorder = None,
+) -> Recorder:
+    """Simulate the whole traverse of ``path`` with time-step ``dt`` [s].
+
+    Speeds come from ``SpeedControl``, or a planned ``SpeedSchedule``. The
+    body and panel temps of ``LumpedThermal`` are only integrated with
+    ``thermal``, and are NaN otherwise. Steps are worked out and recorded
+    ``RECORD_BLOCK`` at a time, into a new ``Recorder`` or ``rec``, e.g. a
+    ``TrajectoryWriter`` to stream them to disk.
+    """
+    if schedule is None:
+        res = _solve_feedback(path, dt)
+    else:
+        res = _replay(path, dt, schedule)
+    n = len(res.dist)
+    if rec is None:
+        rec = Recorder(capacity=n)
+    temps = None  # Body and panel temps of the last step recorded
+    for i in range(0, n, RECORD_BLOCK):
+        temps = _record(rec, path, dt, i, res, thermal, temps)
+    return rec
@@ -0,0 +1,234 @@
+"""Benchmarks of the simulation hot paths, compared against stored baselines.
+
+Each benchmark times an operation ``number`` times per repeat and keeps the
+best repeat, which is the least noisy estimate on a shared machine. Results
+are seconds per operation. Baselines are stored as JSON with the machine
+they were measured on, and the report flags anything slower than the
+baseline by more than ``threshold``:
+
+    python -m sim bench --save   # After a change that's meant to be slower
+    python -m sim bench          # Exits non-zero on a regression
+
+Everything runs offline, from the bundled path data.
+"""
+
+import json
+import pathlib
+import platform
+import time
+from dataclasses import dataclass
+from typing import Callable
+
+import numpy as np
+
+from .paths import Path, PathsImage
+from .simulation import Simulation
+
+BASELINE_FILE = pathlib.Path(__file__).parent / "data" / "bench_baseline.json"
+REPEATS = 5
+THRESHOLD = 0.25  # Fractional slow-down from the baseline to flag
+CONFIRM_RUNS = 2  # Re-measurements of a slow-down before it's flagged
+WARMUP_STEPS = 100  # Steps before timing models, to be away from the start
+STEP_DTS = [60, 600, 3600]  # [s]
+
+
+@dataclass
+class Benchmark:
+    name: str
+    setup: Callable[[], Callable[[], object]]  # Returns the operation to time
+    number: int = 1  # Operations per repeat
+
+    def measure(self, repeats: int = REPEATS) -> float:
+        """Best time [s] per operation over repeats."""
+        best = np.inf
+        for _ in range(repeats):
+            op = self.setup()
+            start = time.perf_counter()
+            for _ in range(self.number):
+                op()
+            best = min(best, time.perf_counter() - start)
+        return best / self.number
+
+
+def _indexed_global_path() -> Path:
+    """Global path with its arc-length index built, so that isn't timed."""
+    path = PathsImage.get_global_path()
+    path._index
+    return path
+
+
+def _path_construction():
+    path = PathsImage.get_global_path()
+    return lambda: Path(path.name, path.lats, path.lons)
+
+
+def _point_at_dist():
+    path = _indexed_global_path()
+    dists = iter(np.random.default_rng(0).uniform(0, path.total_distance(), 10_000))
+    return lambda: path.point_at_dist(next(dists))
+
+
+def _model_step(name: str):
+    def setup():
+        sim = Simulation(_indexed_global_path())
+        for _ in range(WARMUP_STEPS):
+            sim.step()
+        step = getattr(sim.models, name).step
+        return lambda: step(sim.dt)
+
+    return setup
+
+
+def _sim_steps(dt: float):
+    def setup():
+        sim = Simulation(_indexed_global_path(), dt=dt)
+
+        def op():
+            sim.record()
+            sim.step()
+
+        return op
+
+    return setup
+
+
+def _batch_run(dt: float):
+    def setup():
+        sim = Simulation(_indexed_global_path(), dt=dt)
+        return lambda: sim.run(engine="batch")
+
+    return setup
+
+
+def benchmarks() -> list[Benchmark]:
+    models = vars(Simulation().models)
+    return [
+        Benchmark("path.construction", _path_construction, 50),
+        Benchmark("path.point_at_dist", _point_at_dist, 10_000),
+        Benchmark(
+            "paths_image.global_path.cached",
+            lambda: PathsImage.get_global_path,
+            100,
+        ),
+        Benchmark(
+            "paths_image.global_path.parse",
+            lambda: lambda: PathsImage.get_global_path(use_cache=False),
+            20,
+        ),
+        *[Benchmark(f"step.{name}", _model_step(name), 5000) for name in models],
+        *[Benchmark(f"sim.loop_step.dt={dt}", _sim_steps(dt), 2000) for dt in STEP_DTS],
+        *[Benchmark(f"sim.batch_run.dt={dt}", _batch_run(dt)) for dt in STEP_DTS],
+    ]
+
+
+def run(names: list[str] = None, repeats: int = REPEATS) -> dict[str, float]:
+    """Time per operation [s] of every benchmark, or those containing names."""
+    return {
+        bench.name: bench.measure(repeats)
+        for bench in benchmarks()
+        if not names or any(name in bench.name for name in names)
+    }
+
+
+def confirm(
+    results: dict[str, float],
+    baseline: dict[str, float],
+    threshold: float = THRESHOLD,
+    repeats: int = REPEATS,
+) -> dict[str, float]:
+    """Results with apparent regressions re-measured, keeping the best time.
+
+    Timings on a busy machine are noisy, and a one-off slow run shouldn't
+    be reported as a regression.
+    """
+    results = dict(results)
+    by_name = {bench.name: bench for bench in benchmarks()}
+    for _ in range(CONFIRM_RUNS):
+        slow = [
+            name
+            for name, current in results.items()
+            if name in baseline and current > (1 + threshold) * baseline[name]
+        ]
+        for name in slow:
+            results[name] = min(results[name], by_name[name].measure(repeats))
+    return results
+
+
+def machine() -> dict[str, str]:
+    return {
+        "platform": platform.platform(),
+        "processor": platform.processor() or platform.machine(),
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+    }
+
+
+def save_baseline(results: dict[str, float], file: str = BASELINE_FILE):
+    """Merge results into the stored baselines."""
+    try:
+        baseline = load_baseline(file)
+    except FileNotFoundError:
+        baseline = {}
+    baseline.update(results)
+    with open(file, "w") as f:
+        json.dump({"machine": machine(), "results": baseline}, f, indent=2)
+        f.write("\n")
+
+
+def load_baseline(file: str = BASELINE_FILE) -> dict[str, float]:
+    with open(file) as f:
+        return json.load(f)["results"]
+
+
+def compare(
+    results: dict[str, float], baseline: dict[str, float], threshold: float = THRESHOLD
+) -> list[dict]:
+    """Rows of the comparison of results to the baseline, by benchmark."""
+    rows = []
+    for name, current in results.items():
+        base = baseline.get(name)
+        ratio = None if base is None else current / base
+        if ratio is None:
+            status = "new"
+        elif ratio > 1 + threshold:
+            status = "REGRESSION"
+        elif ratio < 1 / (1 + threshold):
+            status = "faster"
+        else:
+            status = "ok"
+        rows.append(
+            {
+                "name": name,
+                "baseline": base,
+                "current": current,
+                "ratio": ratio,
+                "status": status,
+            }
+        )
+    return rows
+
+
+def _format_time(seconds: float) -> str:
+    if seconds is None:
+        return "-"
+    for unit, scale in (("s", 1), ("ms", 1e-3), ("us", 1e-6)):
+        if seconds >= scale:
+            return f"{seconds / scale:.3g} {unit}"
+    return f"{seconds / 1e-9:.3g} ns"
+
+
+def report(rows: list[dict]) -> str:
+    """The comparison rows as a table."""
+    width = max(len(row["name"]) for row in rows)
+    lines = [
+        f"{'benchmark':<{width}}  {'baseline':>10}  {'current':>10}  "
+        f"{'per sec':>9}  ratio"
+    ]
+    for row in rows:
+        ratio = "-" if row["ratio"] is None else f"{row['ratio']:.2f}"
+        lines.append(
+            f"{row['name']:<{width}}  {_format_time(row['baseline']):>10}  "
+            f"{_format_time(row['current']):>10}  {1 / row['current']:>9.4g}  "
+            f"{ratio:>5}  {row['status']}"
+        )
+    return "\n".join(lines)
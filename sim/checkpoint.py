@@ -0,0 +1,111 @@
+"""Checkpoints of a loop-engine simulation part way along its path.
+
+A checkpoint is the public state of every model, the time, the recorded
+steps so far, the speed schedule and the path, in one compressed ``.npz``.
+Private attributes, like ``LumpedThermal._coefs``, are caches of the class
+constants and are rebuilt on restore, so overriding a constant after
+restoring or forking takes effect from there on:
+
+    sim = Simulation()
+    sim.run(until=10_000)  # [km]
+    save(sim, "at_10000km.npz")
+    rec = load("at_10000km.npz").run()
+
+    variant = fork(sim)  # Independent copy sharing the path
+    variant.run()
+
+Checkpoints are pickled, so only load ones you made.
+"""
+
+import copy
+import io
+import os
+import pickle
+
+import numpy as np
+
+from .paths import Path
+from .recorder import Recorder
+from .simulation import Simulation
+
+VERSION = 1
+
+
+def state(sim: Simulation) -> dict:
+    """Time-step, time and the public state of every model."""
+    return {
+        "dt": sim.dt,
+        "t": sim.t,
+        "models": {
+            name: {
+                attr: value
+                for attr, value in vars(model).items()
+                # Skip the back-reference, caches and any profiling wrapper
+                if attr not in ("sim", "step") and not attr.startswith("_")
+            }
+            for name, model in vars(sim.models).items()
+        },
+    }
+
+
+def restore(sim: Simulation, snapshot: dict):
+    """Put a simulation in the state from ``state``."""
+    sim.dt, sim.t = snapshot["dt"], snapshot["t"]
+    for name, attrs in snapshot["models"].items():
+        vars(getattr(sim.models, name)).update(copy.deepcopy(attrs))
+
+
+def _recorder(cols: dict[str, np.ndarray]) -> Recorder:
+    """Recorder holding a copy of recorded columns."""
+    n = len(next(iter(cols.values())))
+    rec = Recorder({name: col.dtype for name, col in cols.items()}, max(n, 1))
+    rec.extend(**cols)
+    return rec
+
+
+def fork(sim: Simulation) -> Simulation:
+    """Independent copy of a simulation, sharing its (read-only) path."""
+    forked = Simulation(sim.path, sim.dt, copy.deepcopy(sim.schedule))
+    restore(forked, state(sim))
+    forked.rec = _recorder({name: sim.rec[name] for name in sim.rec.columns})
+    return forked
+
+
+def save(sim: Simulation, file: "str | os.PathLike"):
+    """Save a simulation to resume later with ``load``.
+
+    Only loop-engine runs can be saved. The batch engine records the whole
+    traverse without moving the models on, so its state doesn't match its
+    recording.
+    """
+    if len(sim.rec) and sim.rec["t"][-1] > sim.t:
+        raise ValueError("Recorded past the simulation's state, by the batch engine?")
+    path = io.BytesIO()
+    sim.path.save(path)
+    extra = {"state": state(sim), "schedule": sim.schedule}
+    np.savez_compressed(
+        file,
+        version=VERSION,
+        path=np.frombuffer(path.getvalue(), np.uint8),
+        extra=np.frombuffer(pickle.dumps(extra), np.uint8),
+        **{f"rec.{name}": sim.rec[name] for name in sim.rec.columns},
+    )
+
+
+def load(file: "str | os.PathLike", path: Path = None) -> Simulation:
+    """Simulation saved with ``save``, on its saved path unless one is given."""
+    with np.load(file) as data:
+        if int(data["version"]) != VERSION:
+            raise ValueError(f"Unsupported checkpoint version {data['version']}")
+        if path is None:
+            path = Path.load(io.BytesIO(data["path"].tobytes()))
+        extra = pickle.loads(data["extra"].tobytes())
+        cols = {
+            name.removeprefix("rec."): data[name]
+            for name in data.files
+            if name.startswith("rec.")
+        }
+    sim = Simulation(path, extra["state"]["dt"], extra["schedule"])
+    restore(sim, extra["state"])
+    sim.rec = _recorder(cols)
+    return sim
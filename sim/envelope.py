@@ -0,0 +1,91 @@
+"""Steady-state thermal operating envelope of META.
+
+The analysis from ``steady_state_thermal.ipynb``, solved for whole grids of
+conditions at once. Each grid axis is either the ground temperature, the
+solar flux or any ``LumpedThermal`` constant:
+
+    from sim.power import Power
+
+    env = envelope({
+        "ground_temp": np.linspace(-50, 450, 100),
+        "solar_flux": np.linspace(Power.MIN_SOLAR_FLUX, Power.MAX_SOLAR_FLUX, 100),
+        "K_INTERFACE": np.linspace(0, 200, 10),
+    })
+    env.body_temp.shape  # (100, 100, 10)
+"""
+
+from types import SimpleNamespace
+
+import numpy as np
+
+from .utils import degC_to_K, K_to_degC
+from .thermal import LumpedThermal, PERIHELION_SOLAR_FLUX
+
+TEMP_TOL = 1e-6  # [K], Max Newton update for a point to count as converged
+MAX_ITERS = 50
+T_FLOOR = 1  # [K], Lower bound on Newton iterates
+
+GROUND_TEMP = 50  # [degC], Default as in the notebook
+
+SUN_VEC = np.array([1, 0, 0])  # Sun straight ahead, as in the notebook
+
+
+def steady_state(
+    ground_temp: np.ndarray = GROUND_TEMP,
+    solar_flux: np.ndarray = PERIHELION_SOLAR_FLUX,
+    sun_vec: np.ndarray = SUN_VEC,
+    **overrides,
+) -> SimpleNamespace:
+    """Steady body and panel temps [degC] where the net heat into both is zero.
+
+    All inputs broadcast together and every point is solved at once with
+    Newton's method. Newton's update is the implicit step of
+    ``LumpedThermal`` with an infinite time-step, started from the
+    temperatures each node would reach without the interface conduction.
+
+    Returns ``body_temp``, ``panel_temp``, per-point ``converged`` flags and
+    the number of ``iters`` taken.
+    """
+    c = LumpedThermal.coefficients(**overrides)
+    q_in_body, q_in_panel = LumpedThermal._heat_inputs(
+        c, sun_vec, degC_to_K(np.asarray(ground_temp, np.float64)), solar_flux
+    )
+    shape = np.broadcast_shapes(*map(np.shape, (q_in_body, q_in_panel, c.kappa)))
+    q_in_body = np.broadcast_to(q_in_body, shape)
+    q_in_panel = np.broadcast_to(q_in_panel, shape)
+    T_body = (q_in_body / (c.ground_body + c.sky_body)) ** 0.25
+    T_panel = (q_in_panel / (c.ground_panel + c.sky_panel)) ** 0.25
+
+    converged = np.zeros(T_body.shape, bool)
+    for iters in range(1, MAX_ITERS + 1):
+        T_body_next, T_panel_next = LumpedThermal._implicit_step(
+            c, T_body, T_panel, q_in_body, q_in_panel, np.inf
+        )
+        converged = (np.abs(T_body_next - T_body) <= TEMP_TOL) & (
+            np.abs(T_panel_next - T_panel) <= TEMP_TOL
+        )
+        # Keep the T^4 linearisation well defined after an overshoot
+        T_body = np.maximum(T_body_next, T_FLOOR)
+        T_panel = np.maximum(T_panel_next, T_FLOOR)
+        if converged.all():
+            break
+
+    return SimpleNamespace(
+        body_temp=K_to_degC(T_body),
+        panel_temp=K_to_degC(T_panel),
+        converged=converged,
+        iters=iters,
+    )
+
+
+def envelope(grid: dict[str, np.ndarray], **fixed) -> SimpleNamespace:
+    """Steady state over every combination of the values in grid.
+
+    Keys are ``"ground_temp"`` [degC], ``"solar_flux"`` [W/m^2] or
+    ``LumpedThermal`` constants, and the result arrays have one axis per key
+    in order. ``fixed`` sets any other inputs for the whole grid.
+    """
+    axes = np.meshgrid(*map(np.asarray, grid.values()), indexing="ij")
+    res = steady_state(**fixed, **dict(zip(grid, axes)))
+    res.grid = grid
+    return res
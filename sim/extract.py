@@ -0,0 +1,176 @@
+"""Extract traverse paths from the coloured overlays of the south pole map.
+
+Each ``paths/images/mercury_south_hemisphere_<colour>.png`` has one traverse
+drawn in red on the map, along with red labels and a dot at the pole. For
+each image the red pixels are masked in one pass, the largest connected
+piece is kept as the traverse, and its pixels are ordered into a polyline by
+walking the longest shortest path through them. That is then converted to
+lat/lon and saved as a ``Path`` that ``Path.load`` reads back:
+
+    paths = extract_all()
+    paths["green"].total_distance()
+
+Saved paths can be simulated with ``python -m sim run --path <file>.npz``.
+"""
+
+import pathlib
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+from scipy import ndimage, sparse
+from scipy.sparse.csgraph import dijkstra
+
+from .paths import Path, LocationArray, R_CIRC
+from .raster import TiledRaster, CENTRE, RADIUS
+
+IMAGES_DIR = pathlib.Path(__file__).parents[1] / "paths" / "images"
+IMAGE_GLOB = "mercury_south_hemisphere_*.png"
+
+STRIDE = 8  # [px], Spacing of the points kept along the polyline
+
+# Fractions of full scale that count as the red the traverses are drawn in,
+# including anti-aliased edges
+MIN_RED = 0.7
+MAX_GREEN_BLUE = 0.3
+
+# Neighbour offsets (row, col) that cover each 8-connected pair once
+_OFFSETS = [(0, 1), (1, -1), (1, 0), (1, 1)]
+
+
+def red_mask(rgb: np.ndarray) -> np.ndarray:
+    """Pixels of an (H, W, 3+) image, in [0, 1] or uint8, drawn in red."""
+    scale = 255 if rgb.dtype == np.uint8 else 1
+    return (
+        (rgb[..., 0] >= MIN_RED * scale)
+        & (rgb[..., 1] <= MAX_GREEN_BLUE * scale)
+        & (rgb[..., 2] <= MAX_GREEN_BLUE * scale)
+    )
+
+
+def largest_component(mask: np.ndarray) -> np.ndarray:
+    """The largest 8-connected piece of a mask."""
+    labels, n = ndimage.label(mask, structure=np.ones((3, 3)))
+    if not n:
+        raise ValueError("Nothing to extract in mask")
+    sizes = np.bincount(labels.ravel())
+    sizes[0] = 0
+    return labels == np.argmax(sizes)
+
+
+def _pixel_graph(rows: np.ndarray, cols: np.ndarray, shape) -> sparse.csr_matrix:
+    """Sparse graph of pixels with edges between 8-neighbours [px]."""
+    index = np.full(shape, -1, np.intp)
+    index[rows, cols] = np.arange(len(rows))
+    padded = np.pad(index, 1, constant_values=-1)
+
+    heads, tails, weights = [], [], []
+    for dr, dc in _OFFSETS:
+        nbrs = padded[rows + 1 + dr, cols + 1 + dc]
+        ok = nbrs >= 0
+        heads.append(index[rows[ok], cols[ok]])
+        tails.append(nbrs[ok])
+        weights.append(np.full(ok.sum(), np.hypot(dr, dc)))
+    return sparse.coo_matrix(
+        (np.concatenate(weights), (np.concatenate(heads), np.concatenate(tails))),
+        shape=(len(rows), len(rows)),
+    ).tocsr()
+
+
+def _walk(preds: np.ndarray, a: int, b: int) -> list[int]:
+    """Nodes from a to b, from Dijkstra predecessors with source a."""
+    line = [b]
+    while line[-1] != a:
+        line.append(preds[line[-1]])
+    return line[::-1]
+
+
+def order_pixels(mask: np.ndarray) -> np.ndarray:
+    """Pixels (N, 2) of a thin connected line, as (x, y) from end to end.
+
+    The pixels form a graph with edges between 8-neighbours. The ends are the
+    two pixels furthest apart along it, found with two Dijkstra passes, and
+    the shortest path between them is the line. Stray pixels at the edges of
+    the line are skipped. A closed loop is the line there and back again on
+    its other side, with the pixels near the first half removed.
+    """
+    rows, cols = np.nonzero(mask)
+    graph = _pixel_graph(rows, cols, mask.shape)
+
+    dists = dijkstra(graph, directed=False, indices=0)
+    a = int(np.argmax(dists))
+    dists, preds = dijkstra(graph, directed=False, indices=a, return_predecessors=True)
+    b = int(np.argmax(dists))
+    line = _walk(preds, a, b)
+
+    # Keep the ends but nothing else along or beside the first half
+    near = np.zeros(mask.shape, bool)
+    near[rows[line], cols[line]] = True
+    near = ndimage.binary_dilation(near, iterations=2)[rows, cols]
+    ends = np.hypot(rows - rows[a], cols - cols[a]) <= 3
+    ends |= np.hypot(rows - rows[b], cols - cols[b]) <= 3
+    keep = sparse.diags((~near | ends).astype(np.float64))
+    dists, preds = dijkstra(
+        keep @ graph @ keep, directed=False, indices=b, return_predecessors=True
+    )
+    if np.isfinite(dists[a]):
+        line += _walk(preds, b, a)[1:]
+    line = np.array(line)
+    return np.stack([cols[line], rows[line]], axis=-1)
+
+
+def _thin(pixels: np.ndarray) -> np.ndarray:
+    """Every STRIDE'th pixel, and the last."""
+    keep = np.unique(np.append(np.arange(0, len(pixels), STRIDE), len(pixels) - 1))
+    return pixels[keep]
+
+
+def path_from_pixels(name: str, pixels: np.ndarray) -> Path:
+    """Path through image pixels (N, 2), keeping every STRIDE'th point."""
+    pixels = _thin(pixels)
+    # Centre on the pole, flip y b/c pixels go downwards, scale to km
+    x = (pixels[:, 0] - CENTRE[0]) * (R_CIRC / RADIUS)
+    y = -(pixels[:, 1] - CENTRE[1]) * (R_CIRC / RADIUS)
+    points = LocationArray.from_xy(x, y)
+    return Path(name, points.lats, points.lons)
+
+
+def extract(file: "str | pathlib.Path") -> Path:
+    """The traverse drawn on one overlay image, named by its colour."""
+    import matplotlib.image as mpimg
+
+    file = pathlib.Path(file)
+    name = file.stem.rpartition("_")[2]
+    mask = largest_component(red_mask(mpimg.imread(file)))
+    return path_from_pixels(name, order_pixels(mask))
+
+
+def extract_window(
+    raster: TiledRaster, name: str, window: tuple[int, int, int, int]
+) -> Path:
+    """The traverse drawn inside a window (x0, y0, x1, y1) of a tiled raster.
+
+    Only the tiles under the window are read, for overlays too large to load.
+    """
+    x0, y0, x1, y1 = window
+    mask = largest_component(red_mask(raster.read(x0, y0, x1, y1)))
+    pixels = _thin(order_pixels(mask)) + (max(x0, 0), max(y0, 0))
+    lats, lons = raster.pixel_to_latlon(pixels[:, 0], pixels[:, 1])
+    return Path(name, lats, lons)
+
+
+def extract_all(
+    files: list = None, out_dir: "str | pathlib.Path" = None, processes: int = None
+) -> dict[str, Path]:
+    """Extract every overlay in a process pool, optionally saving each path.
+
+    Paths are saved as ``<out_dir>/<colour>.npz``, to read with ``Path.load``.
+    """
+    files = sorted(IMAGES_DIR.glob(IMAGE_GLOB)) if files is None else files
+    with ProcessPoolExecutor(processes) as pool:
+        paths = {path.name: path for path in pool.map(extract, files)}
+    if out_dir is not None:
+        out_dir = pathlib.Path(out_dir)
+        out_dir.mkdir(parents=True, exist_ok=True)
+        for name, path in paths.items():
+            path.save(out_dir / f"{name}.npz")
+    return paths
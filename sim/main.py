@@ -1,180 +1,345 @@
-from types import SimpleNamespace
+"""Command line entry point, run with ``python -m sim``.
+
+    python -m sim run --dt 600 --engine batch --plot power_gen
+    python -m sim run --engine batch --schedule time
+    python -m sim run --profile
+    python -m sim run --dt 1 --stream run_dt1
+    python -m sim run --until 10000 --checkpoint at_10000km.npz
+    python -m sim sweep --engine loop --fork at_10000km.npz -p "dt=[600, 300]"
+    python -m sim sweep -p "SpeedControl.MAX_SPEED=[1.2, 1.6]" -p "dt=[600, 300]"
+    python -m sim routes --top 5
+    python -m sim extract --out paths/extracted
+    python -m sim run --path paths/extracted/green.npz
+    python -m sim tiles paths/images/mercury_south_hemisphere.jpg map_tiles
+    python -m sim bench --filter step.
+    python -m sim import-time
+
+Plotting and progress bars are opt-in, and matplotlib and tqdm are only
+imported when they're asked for.
+"""
+
+import argparse
+import ast
+import pathlib
+import subprocess
+import sys
+import time
 
 import numpy as np
-import matplotlib.pyplot as plt
-from tqdm import tqdm
-
-from utils import SECS_PER_DAY
-from paths import PathsImage
-from mercury import Terminator, Sun, SurfaceThermal
-from traversal import Traversal, SpeedControl
-from power import Power
-
-plt.style.use("ggplot")
-plt.rcParams.update(
-    {
-        "figure.autolayout": True,
-        "font.family": "sans-serif",
-        "font.sans-serif": "PT Sans",
-    }
-)
-
-DT = 60 * 10  # [s]
-
-path = PathsImage.get_global_path()
-
-sim = SimpleNamespace()
-sim.path = path
-sim.t = [0]  # [s]
-
-sim.pos = []
-sim.dist = []  # [km]
-sim.speed = []  # [m/s]
-sim.t_excess = []  # [s]
-sim.bearing = []  # [deg]
-sim.term_lon = []  # [deg]
-sim.phi = []  # [deg]
-sim.surf_temp = []  # [degC]
-sim.sun_elevation = []  # [deg]
-sim.sun_azimuth = []  # [deg]
-sim.power_gen = []  # [W]
-
-sim.models = SimpleNamespace()
-sim.models.term = Terminator(sim)
-sim.models.traverse = Traversal(sim)
-sim.models.speed = SpeedControl(sim)
-sim.models.surf_temp = SurfaceThermal(sim)
-sim.models.sun = Sun(sim)
-sim.models.power = Power(sim)
-
-PBAR_FORMAT = (
-    "{l_bar}{bar}| {n:.3f}/{total:.0f} [{elapsed}<{remaining}, {rate_fmt}{postfix}]"
-)
-with tqdm(total=path.total_distance(), unit="km", bar_format=PBAR_FORMAT) as pbar:
-    while True:
-
-        # Compute state values at current time t_i
-        sim.pos.append(sim.models.traverse.pos)
-        sim.dist.append(sim.models.traverse.dist)
-        sim.speed.append(sim.models.speed.speed)
-        sim.t_excess.append(sim.models.speed.t_excess)
-        sim.bearing.append(sim.models.traverse.bearing)
-        sim.term_lon.append(sim.models.term.longitude)
-        sim.phi.append(sim.models.traverse.phi)
-        sim.surf_temp.append(sim.models.surf_temp.surface_temp)
-        sim.sun_elevation.append(sim.models.sun.elevation)
-        sim.sun_azimuth.append(sim.models.sun.azimuth)
-        sim.power_gen.append(sim.models.power.generated)
-
-        # Exit only when have traversed entire path
-        if sim.dist[-1] >= sim.path.total_distance():
-            break
-        if len(sim.dist) > 2:
-            pbar.update(sim.dist[-1] - sim.dist[-2])
-
-        # Propogate to next time-step at t_{i+1}
-        sim.t.append(sim.t[-1] + DT)
-        sim.models.term.step(DT)
-        sim.models.surf_temp.step(DT)
-        sim.models.speed.step(DT)
-        sim.models.traverse.step(DT)
-        sim.models.sun.step(DT)
-        sim.models.power.step(DT)
-
-sim.t = np.array(sim.t)
-sim.days = sim.t / SECS_PER_DAY
-sim.dist = np.array(sim.dist)
-
-
-def plot_traversal():
-    fig, axs = plt.subplots(2, 2, num="traversal", sharex="all", figsize=(10, 6))
-    fig.suptitle("Traversal")
-    axs[0, 0].plot(sim.days, [p.lat for p in sim.pos])
-    axs[0, 0].set_title("Latitude")
-    axs[0, 0].set_ylabel("[deg]")
-    axs[1, 0].plot(sim.days, [p.lon for p in sim.pos])
-    axs[1, 0].set_title("Longitude")
-    axs[1, 0].set_ylabel("[deg]")
-    axs[0, 1].plot(sim.days, sim.speed)
-    axs[0, 1].set_title("Speed")
-    axs[0, 1].set_ylabel("[m/s]")
-    axs[1, 1].plot(sim.days, np.unwrap(sim.bearing, period=360))
-    axs[1, 1].set_title("Bearing")
-    axs[1, 1].set_ylabel("[deg]")
-    for i in range(axs.shape[-1]):
-        axs[-1, i].set_xlabel("Mission Time [days]")
-
-
-def plot_thermal():
-    fig, axs = plt.subplots(2, 1, num="thermal", sharex="all", figsize=(6, 6))
-    fig.suptitle("Thermal")
-    axs[0].plot(sim.days, sim.surf_temp)
-    axs[0].set_title("Surface Temp")
-    axs[0].set_ylabel("[degC]")
-    axs[1].plot(sim.days, sim.phi)
-    axs[1].set_title("Subsolar Phi Angle")
-    axs[1].set_ylabel("[deg]")
-    axs[1].set_xlabel("Mission Time [day]")
-
-
-def plot_sun():
-    fig, axs = plt.subplots(2, 1, num="sun", sharex="all", figsize=(10, 6))
-    axs[0].plot(sim.days, sim.sun_azimuth)
-    axs[0].set_title("Local Sun Azimuth")
-    axs[0].set_ylabel("[deg]")
-    axs[1].plot(sim.days, sim.sun_elevation)
-    axs[1].set_title("Sun Elevation")
-    axs[1].set_ylabel("[deg]")
-    axs[1].set_xlabel("Mission Time [day]")
-    plt.show()
-
-
-def plot_power_gen():
-    fig, ax = plt.subplots(num="power-gen", sharex="all", figsize=(10, 6))
-    min_power_gen = np.array(sim.power_gen)
-    max_power_gen = (
-        min_power_gen / sim.models.power.SOLAR_FLUX * sim.models.power.MAX_SOLAR_FLUX
-    )
-    ax.fill_between(sim.days, min_power_gen, max_power_gen, alpha=0.5)
-    ax.plot(sim.days, (min_power_gen + max_power_gen) / 2)
-    ax.set_title("Generated Solar Power")
-    ax.set_ylabel("[W]")
-    ax.set_xlabel("Mission Time [day]")
-
-
-def plot_stoppage_time():
-    """Plot possible stoppage time per mission day."""
-    ts, t_excess = [], []
-    prev_day = 0
-    day_excess = 0
-    for i, day in enumerate(sim.days):
-        if int(day) != prev_day:
-            ts.append(prev_day)
-            t_excess.append(day_excess)
-            day_excess = 0
-            prev_day = day
-        else:
-            day_excess += sim.t_excess[i]
-    ts, t_excess = np.array(ts), np.array(t_excess)
-    t_excess /= 60 * 60  # Convert secs to hours
-
-    fig, axs = plt.subplots(2, 1, num="stoppage-time", sharex="all")
-    axs[0].plot(sim.days, sim.speed)
-    axs[0].set_ylabel("Speed [m/s]")
-    axs[0].set_title("Required Speed w/ No Stopping")
-    axs[1]._get_lines.get_next_color()
-    axs[1].bar(ts, t_excess, align="center", color=axs[1]._get_lines.get_next_color())
-    axs[1].set_xlabel("Mission Day")
-    axs[1].set_ylabel("Stoppage Time [hour]")
-    axs[1].set_title("Maximum Stoppage Time Per Mission Day")
-
-
-PLOT_STUFF = True
-plt.ion()
-if PLOT_STUFF:
-    # Plot a bunch of shit
-    # plot_traversal()
-    # plot_thermal()
-    # plot_sun()
-    plot_power_gen()
-    # plot_stoppage_time()
+
+from .utils import SECS_PER_DAY
+from .paths import Path
+from .simulation import DT, Simulation
+from .raster import TiledRaster, CENTRE, RADIUS, TILE
+
+IMPORT_TIME_BUDGET = 0.75  # [s], For importing the headless simulation
+
+PLOT_NAMES = ["traversal", "thermal", "sun", "power_gen", "stoppage_time"]
+
+PATH_HELP = "Path .npz to simulate, e.g. from extract, instead of the global path"
+
+
+def run(args: argparse.Namespace):
+    start = time.perf_counter()
+    if args.resume:
+        from . import checkpoint
+
+        sim = checkpoint.load(args.resume)
+        sim.dt = args.dt or sim.dt
+    else:
+        path = None if args.path is None else Path.load(args.path)
+        sim = Simulation(path, dt=args.dt or DT)
+    if args.stream:
+        from .trajectory import TrajectoryWriter
+
+        writer = TrajectoryWriter(args.stream)
+        # Start with the steps restored from a checkpoint, if any
+        writer.extend(**{name: sim.rec[name] for name in sim.rec.columns})
+        sim.rec = writer
+    if args.schedule:
+        from .schedule import optimize
+
+        sim.schedule = optimize(sim.path, objective=args.schedule)
+    rec = sim.run(
+        engine=args.engine,
+        progress=args.progress,
+        profile=args.profile,
+        allocations=args.allocations,
+        until=args.until,
+        thermal=args.thermal,
+    )
+    elapsed = time.perf_counter() - start
+    if args.checkpoint:
+        from . import checkpoint
+
+        checkpoint.save(sim, args.checkpoint)
+
+    print(f"Path:     {sim.path.name}")
+    print(f"Steps:    {len(rec)} at dt = {sim.dt:g} s")
+    print(f"Duration: {rec['t'][-1] / SECS_PER_DAY:.2f} days")
+    print(f"Runtime:  {elapsed:.3f} s")
+    if sim.profiler is not None:
+        print()
+        print(sim.profiler.report())
+
+    if args.out:
+        np.savez(args.out, **{name: rec[name] for name in rec.columns})
+    if args.plot:
+        import matplotlib.pyplot as plt
+
+        from . import plots
+
+        for name in args.plot:
+            plots.PLOTS[name](rec)
+        plt.show()
+
+
+def run_sweep(args: argparse.Namespace):
+    from . import sweep
+
+    grid = {}
+    for param in args.param:
+        name, _, values = param.partition("=")
+        grid[name.strip()] = ast.literal_eval(values)
+    start = None
+    if args.fork:
+        from . import checkpoint
+
+        start = checkpoint.load(args.fork)
+    rows = sweep.sweep(
+        grid,
+        path=None if args.path is None else Path.load(args.path),
+        processes=args.processes,
+        engine=args.engine,
+        profile=args.profile,
+        start=start,
+    )
+
+    print("\t".join(rows[0]))
+    for row in rows:
+        print(
+            "\t".join(
+                f"{v:.4g}" if isinstance(v, float) else str(v) for v in row.values()
+            )
+        )
+    if args.out:
+        sweep.write_csv(rows, args.out)
+
+
+def routes(args: argparse.Namespace):
+    from .routes import RouteGraph
+
+    graph = RouteGraph.load()
+    start = graph.nearest_junction(args.start)
+    end = None if args.end is None else graph.nearest_junction(args.end)
+    ranked = graph.search(start, end, processes=args.processes)
+    print(f"{len(ranked)} feasible routes in a {graph.band:.2f} deg band")
+    print("length [km]\tsweep [days]\tspeed [m/s]\texposure [deg]\troute")
+    for route in ranked[: args.top]:
+        print(
+            f"{route.length:.0f}\t{route.sweep_time / SECS_PER_DAY:.1f}\t"
+            f"{route.required_speed:.3f}\t{route.exposure:.2f}\t"
+            + " → ".join(route.names)
+        )
+
+
+def extract(args: argparse.Namespace):
+    from .extract import extract_all
+
+    paths = extract_all(out_dir=args.out, processes=args.processes)
+    print("name\tpoints\tlength [km]")
+    for name, path in paths.items():
+        print(f"{name}\t{len(path.lats)}\t{path.total_distance():.0f}")
+
+
+def tiles(args: argparse.Namespace):
+    raster = TiledRaster.convert(
+        args.source, args.out, args.centre, args.radius, args.tile
+    )
+    rows, cols = raster.tiles.shape[:2]
+    print(f"{raster.width} x {raster.height} px in {rows} x {cols} tiles")
+
+
+def run_bench(args: argparse.Namespace):
+    from . import bench
+
+    baseline_file = args.baseline or bench.BASELINE_FILE
+    results = bench.run(args.filter, repeats=args.repeats)
+    if args.save:
+        bench.save_baseline(results, baseline_file)
+    try:
+        baseline = bench.load_baseline(baseline_file)
+    except FileNotFoundError:
+        baseline = {}
+    results = bench.confirm(results, baseline, args.threshold, args.repeats)
+    rows = bench.compare(results, baseline, args.threshold)
+    print(bench.report(rows))
+    if any(row["status"] == "REGRESSION" for row in rows):
+        sys.exit(1)
+
+
+def import_time(args: argparse.Namespace):
+    """Time a cold import of the headless simulation in a fresh interpreter."""
+    code = (
+        "import sys, time\n"
+        "start = time.perf_counter()\n"
+        "import sim.simulation\n"
+        "print(time.perf_counter() - start)\n"
+        "print(sorted({'matplotlib', 'tqdm'} & sys.modules.keys()))\n"
+    )
+    out = subprocess.run(
+        [sys.executable, "-c", code],
+        cwd=pathlib.Path(__file__).parents[1],
+        check=True,
+        capture_output=True,
+        text=True,
+    ).stdout.splitlines()
+    elapsed, heavy = float(out[0]), out[1]
+    print(f"Import time: {elapsed:.3f} s (budget {args.budget:.3f} s)")
+    print(f"Heavy modules imported: {heavy}")
+    if elapsed > args.budget or heavy != "[]":
+        sys.exit(1)
+
+
+def main(argv: list[str] = None):
+    parser = argparse.ArgumentParser(prog="python -m sim")
+    subparsers = parser.add_subparsers(required=True)
+
+    run_parser = subparsers.add_parser("run", help="Simulate the whole traverse")
+    run_parser.add_argument(
+        "--dt", type=float, help=f"Time-step [s], {DT} or the checkpoint's"
+    )
+    run_parser.add_argument("--engine", choices=["loop", "batch"], default="loop")
+    run_parser.add_argument("--path", help=PATH_HELP)
+    run_parser.add_argument("--progress", action="store_true")
+    run_parser.add_argument(
+        "--profile", action="store_true", help="Time each model's step (loop engine)"
+    )
+    run_parser.add_argument(
+        "--allocations",
+        action="store_true",
+        help="Also trace the peak memory allocated by each step, much slower",
+    )
+    run_parser.add_argument(
+        "--schedule",
+        choices=["time", "margin"],
+        help="Follow a speed schedule optimized for this instead of SpeedControl",
+    )
+    run_parser.add_argument(
+        "--until", type=float, help="Stop this far along the path [km] (loop engine)"
+    )
+    run_parser.add_argument(
+        "--thermal",
+        action="store_true",
+        help="Integrate the body and panel temps (always done by the loop engine)",
+    )
+    run_parser.add_argument(
+        "--stream", help="Write steps to this directory as they're recorded"
+    )
+    run_parser.add_argument(
+        "--checkpoint", help="Save the final state to an .npz (loop engine)"
+    )
+    run_parser.add_argument(
+        "--resume", help="Carry on from a saved checkpoint (loop engine)"
+    )
+    run_parser.add_argument("--plot", action="append", choices=PLOT_NAMES)
+    run_parser.add_argument("--out", help="Save recorded columns to an .npz")
+    run_parser.set_defaults(func=run)
+
+    sweep_parser = subparsers.add_parser(
+        "sweep", help="Simulate a grid of parameters in parallel"
+    )
+    sweep_parser.add_argument(
+        "-p",
+        "--param",
+        action="append",
+        required=True,
+        help='Parameter and list of values, e.g. "SpeedControl.MAX_SPEED=[1.2, 1.6]"',
+    )
+    sweep_parser.add_argument("--path", help=PATH_HELP)
+    sweep_parser.add_argument("--processes", type=int)
+    sweep_parser.add_argument("--engine", choices=["loop", "batch"], default="batch")
+    sweep_parser.add_argument(
+        "--profile",
+        action="store_true",
+        help="Add each model's step times to the results (loop engine)",
+    )
+    sweep_parser.add_argument(
+        "--fork", help="Carry on every scenario from a checkpoint (loop engine)"
+    )
+    sweep_parser.add_argument("--out", help="Save the results table to a .csv")
+    sweep_parser.set_defaults(func=run_sweep)
+
+    routes_parser = subparsers.add_parser(
+        "routes", help="Rank feasible routes over all the path segments"
+    )
+    routes_parser.add_argument(
+        "--start", type=float, nargs=2, default=(288, 379), help="Pixel x y"
+    )
+    routes_parser.add_argument("--end", type=float, nargs=2, help="Pixel x y")
+    routes_parser.add_argument("--top", type=int, default=10)
+    routes_parser.add_argument("--processes", type=int, default=1)
+    routes_parser.set_defaults(func=routes)
+
+    extract_parser = subparsers.add_parser(
+        "extract", help="Extract the traverse paths from the overlay images"
+    )
+    extract_parser.add_argument("--out", help="Directory to save each path's .npz")
+    extract_parser.add_argument("--processes", type=int)
+    extract_parser.set_defaults(func=extract)
+
+    tiles_parser = subparsers.add_parser(
+        "tiles", help="Convert a map image to memory-mapped tiles"
+    )
+    tiles_parser.add_argument("source", help="Image file")
+    tiles_parser.add_argument("out", help="Directory to write the tiles to")
+    tiles_parser.add_argument(
+        "--centre", type=float, nargs=2, default=CENTRE, help="Pole pixel x y"
+    )
+    tiles_parser.add_argument(
+        "--radius", type=float, default=RADIUS, help="Equatorial radius [px]"
+    )
+    tiles_parser.add_argument("--tile", type=int, default=TILE, help="Tile size [px]")
+    tiles_parser.set_defaults(func=tiles)
+
+    from . import bench
+
+    bench_parser = subparsers.add_parser(
+        "bench", help="Benchmark the hot paths against the stored baselines"
+    )
+    bench_parser.add_argument(
+        "--filter", action="append", help="Only benchmarks containing this"
+    )
+    bench_parser.add_argument("--repeats", type=int, default=bench.REPEATS)
+    bench_parser.add_argument(
+        "--threshold",
+        type=float,
+        default=bench.THRESHOLD,
+        help="Fractional slow-down to flag",
+    )
+    bench_parser.add_argument("--baseline", help="Baseline .json to compare to")
+    bench_parser.add_argument(
+        "--save", action="store_true", help="Store the results as the baseline"
+    )
+    bench_parser.set_defaults(func=run_bench)
+
+    import_parser = subparsers.add_parser(
+        "import-time", help="Check the headless import-time budget"
+    )
+    import_parser.add_argument("--budget", type=float, default=IMPORT_TIME_BUDGET)
+    import_parser.set_defaults(func=import_time)
+
+    args = parser.parse_args(argv)
+    if getattr(args, "resume", None) and args.engine == "batch":
+        run_parser.error("--resume needs the loop engine")
+    if getattr(args, "checkpoint", None) and args.engine == "batch":
+        run_parser.error("--checkpoint needs the loop engine")
+    if getattr(args, "resume", None) and args.path:
+        run_parser.error("--resume carries on along the checkpoint's path")
+    if getattr(args, "fork", None) and args.path:
+        sweep_parser.error("--fork carries on along the checkpoint's path")
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,23 +1,39 @@
+from functools import cache
+
 import numpy as np
-from scipy.spatial.transform import Rotation
 
-from utils import Model, degC_to_K, K_to_degC, snap_angle_range
+from .utils import Model, degC_to_K, K_to_degC, snap_angle_range, SECS_PER_DAY
 
 
 class Terminator(Model):
     """Model of terminator movement."""
 
+    OUTPUTS = ("longitude",)
+
     SPEED = 360 / (175.94 * 24 * 60 * 60)  # [deg/s]
+    LEAD = 90 - 86.5  # [deg], Initial lead of the rover past the terminator
 
     def __init__(self, sim):
         super().__init__(sim)
-        self.longitude = sim.path.points[0].lon - (90 - 86.5)
+        self.longitude = self.initial_longitude(sim.path)
+
+    @classmethod
+    def initial_longitude(cls, path) -> float:
+        return path.points[0].lon - cls.LEAD
+
+    @classmethod
+    def longitude_at(cls, path, t: np.ndarray) -> np.ndarray:
+        """Terminator longitude at mission time(s) t [s]."""
+        return cls.initial_longitude(path) + cls.SPEED * t
 
     def step(self, dt: float):
         self.longitude += self.SPEED * dt
 
 
 class Sun(Model):
+    INPUTS = ("traverse.alpha", "traverse.bearing")
+    OUTPUTS = ("elevation", "azimuth", "vec")
+
     def __init__(self, sim):
         super().__init__(sim)
         self.compute()
@@ -25,20 +41,174 @@ class Sun(Model):
     def compute(self):
         self.elevation = self.sim.models.traverse.alpha
         self.azimuth = snap_angle_range(90 - self.sim.models.traverse.bearing)
-        R = Rotation.from_euler("ZY", [-self.azimuth, -self.elevation], degrees=True)
-        if self.elevation > 0:
-            self.vec = R.apply(np.array([1, 0, 0]))
-        else:
-            self.vec = np.zeros(3)
+        self.vec = self.sun_vectors(self.azimuth, self.elevation)
 
     def step(self, dt: float):
         self.compute()
 
+    @staticmethod
+    def sun_vectors(azimuth: np.ndarray, elevation: np.ndarray) -> np.ndarray:
+        """Unit vector(s) (..., 3) to the Sun in the rover frame, zero at night.
+
+        Equivalent to rotating [1, 0, 0] by the intrinsic "ZY" Euler angles
+        (-azimuth, -elevation), written out in closed form.
+        """
+        az, el = np.deg2rad(azimuth), np.deg2rad(elevation)
+        cos_el = np.cos(el)
+        vec = np.stack([cos_el * np.cos(az), -cos_el * np.sin(az), np.sin(el)], -1)
+        return vec * (np.asarray(elevation) > 0)[..., np.newaxis]
+
+
+@cache
+def _sun_distance_table(a: float, e: float, n: int) -> np.ndarray:
+    """Sun distance [AU] at n evenly spaced mean anomalies over one orbit."""
+    M = np.linspace(0, 2 * np.pi, n)
+    E = M.copy()
+    for _ in range(20):
+        E -= (E - e * np.sin(E) - M) / (1 - e * np.cos(E))
+    return a * (1 - e * np.cos(E))
+
+
+class Orbit:
+    """Mercury's heliocentric orbit, as a table of Sun distance over one period.
+
+    Kepler's equation is solved once for a grid of mean anomalies, and Sun
+    distance and solar flux at any mission time are linear interpolations
+    into it. O(1) per query and broadcasts over arrays of times.
+    """
+
+    SEMI_MAJOR_AXIS = 0.387098  # [AU]
+    ECCENTRICITY = 0.205630
+    PERIOD = 87.969 * SECS_PER_DAY  # [s]
+    SOLAR_CONSTANT = 1367  # [W / m^2], At 1 AU
+    MEAN_ANOMALY_0 = 180  # [deg], At mission start, 0 is perihelion
+
+    TABLE_SIZE = 1025  # Less than 1e-6 AU interpolation error
+
+    @classmethod
+    def sun_distance(cls, t: np.ndarray) -> np.ndarray:
+        """Distance [AU] from the Sun at mission time(s) t [s]."""
+        orbits = t / cls.PERIOD + cls.MEAN_ANOMALY_0 / 360
+        u = (orbits - np.floor(orbits)) * (cls.TABLE_SIZE - 1)
+        i = np.minimum(np.asarray(u).astype(np.intp), cls.TABLE_SIZE - 2)
+        table = _sun_distance_table(
+            cls.SEMI_MAJOR_AXIS, cls.ECCENTRICITY, cls.TABLE_SIZE
+        )
+        return table[i] + (u - i) * (table[i + 1] - table[i])
+
+    @classmethod
+    def solar_flux(cls, t: np.ndarray) -> np.ndarray:
+        """Solar flux [W/m^2] at Mercury at mission time(s) t [s]."""
+        return cls.SOLAR_CONSTANT / cls.sun_distance(t) ** 2
+
+
+# [AU], Perihelion and aphelion, widened to include the rounded values of the
+# RFP so they can still be pinned with SurfaceThermal.R_AU
+R_AU_MIN = min(Orbit.SEMI_MAJOR_AXIS * (1 - Orbit.ECCENTRICITY), 0.3075)
+R_AU_MAX = max(Orbit.SEMI_MAJOR_AXIS * (1 + Orbit.ECCENTRICITY), 0.4667)
+T_COLD = 110  # [K], Night side surface temp
+
+
+def _subsolar_temp(r: np.ndarray) -> np.ndarray:
+    """Surface temp [K] at the subsolar point at distance r [AU] from the Sun."""
+    if not np.all((R_AU_MIN <= r) & (r <= R_AU_MAX)):
+        raise ValueError(
+            f"Sun distance outside Mercury's orbit [{R_AU_MIN:.4f}, {R_AU_MAX:.4f}] AU"
+        )
+    return 407 + (8 / np.sqrt(r))
+
+
+def surface_temp(phi: np.ndarray, r: np.ndarray) -> np.ndarray:
+    """Surface temp [degC] at subsolar angle(s) phi [deg] and Sun distance(s) r [AU].
+
+    Broadcasts over arrays of phi and r like a ufunc.
+    """
+    abs_phi = np.abs(phi)
+    night = (90 <= abs_phi) & (abs_phi <= 270)
+    cos_phi = np.maximum(np.cos(np.deg2rad(phi)), 0)
+    x = abs_phi / 90
+    # Products and square roots, much quicker than float powers over arrays
+    T_K = _subsolar_temp(r) * np.sqrt(np.sqrt(cos_phi)) + T_COLD * (x * x * x)
+    return K_to_degC(np.where(night, T_COLD, T_K))
+
+
+def surface_temp_slope(phi: np.ndarray, temp: np.ndarray) -> np.ndarray:
+    """Rate of change [degC/deg] of ``surface_temp`` with phi, 0 on the night side.
+
+    Takes the surface temp(s) [degC] at phi, which the slope is cheaper to
+    work out from than the Sun distance.
+    """
+    abs_phi = np.abs(phi)
+    day = abs_phi < 90
+    x = abs_phi / 90
+    cold = T_COLD * (x * x * x)
+    # d/dphi of T_sub * cos(phi)^(1/4) is -T_sub * cos(phi)^(1/4) * tan(phi) / 4
+    sunlit = degC_to_K(temp) - cold
+    slope = np.deg2rad(-0.25) * sunlit * np.tan(np.deg2rad(np.where(day, phi, 0)))
+    slope += 3 * np.sign(phi) * cold / np.maximum(abs_phi, 1e-300)
+    return np.where(day, slope, 0)
+
+
+# Inverse table resolution, giving less than PHI_TABLE_ERROR error
+_PHI_TABLE_RS = 17
+_PHI_TABLE_WS = 513
+PHI_TABLE_ERROR = 1e-3  # [deg]
+
+
+@cache
+def _phi_table() -> np.ndarray:
+    """Day side phi [deg] on a grid of Sun distance r and normalised temp w.
+
+    ``w = sqrt((T_sub - T) / (T_sub - T_COLD))`` runs from 0 at the subsolar
+    point to 1 at the terminator. Near the subsolar point the temp is
+    quadratic in phi, so phi is close to linear in w and the table stays
+    accurate where phi(T) itself has infinite slope. Each entry is solved by
+    vectorized bisection, using the fact that temp decreases with phi.
+    """
+    rs = np.linspace(R_AU_MIN, R_AU_MAX, _PHI_TABLE_RS)[:, np.newaxis]
+    ws = np.linspace(0, 1, _PHI_TABLE_WS)
+    T_sub = _subsolar_temp(rs)
+    temps = K_to_degC(T_sub - ws**2 * (T_sub - T_COLD))
+    lo = np.zeros(temps.shape)
+    hi = np.full(temps.shape, 90.0)
+    for _ in range(50):
+        mid = (lo + hi) / 2
+        too_hot = surface_temp(mid, rs) > temps
+        lo = np.where(too_hot, mid, lo)
+        hi = np.where(too_hot, hi, mid)
+    return (lo + hi) / 2
+
+
+def phi_from_surface_temp(temp: np.ndarray, r: np.ndarray) -> np.ndarray:
+    """Day side subsolar angle [deg] in [0, 90] with surface temp [degC] at r [AU].
+
+    The inverse of ``surface_temp``, by bilinear interpolation of a table
+    precomputed over the whole perihelion to aphelion range. O(1) per query
+    and broadcasts over arrays. Agrees with the exact inverse to within
+    PHI_TABLE_ERROR. Temps hotter than the subsolar point give 0, and temps at
+    or below the night side temp give 90.
+    """
+    table = _phi_table()
+    T_sub = _subsolar_temp(r)
+    x = (T_sub - degC_to_K(temp)) / (T_sub - T_COLD)
+    u = np.sqrt(np.clip(x, 0, 1)) * (_PHI_TABLE_WS - 1)
+    v = (np.asarray(r) - R_AU_MIN) / (R_AU_MAX - R_AU_MIN) * (_PHI_TABLE_RS - 1)
+    i = np.minimum(u.astype(np.intp), _PHI_TABLE_WS - 2)
+    j = np.minimum(v.astype(np.intp), _PHI_TABLE_RS - 2)
+    fu, fv = u - i, v - j
+    lo = table[j, i] + fu * (table[j, i + 1] - table[j, i])
+    hi = table[j + 1, i] + fu * (table[j + 1, i + 1] - table[j + 1, i])
+    return lo + fv * (hi - lo)
+
 
 class SurfaceThermal(Model):
     """Model of Mercury's surface temperature."""
 
-    R_AU = 0.38
+    INPUTS = ("t",)
+    LAGGED = ("traverse.phi",)
+    OUTPUTS = ("surface_temp",)
+
+    R_AU = None  # [AU], Fixed Sun distance, or None to follow Mercury's orbit
 
     def __init__(self, sim):
         super().__init__(sim)
@@ -47,25 +217,11 @@ class SurfaceThermal(Model):
     def step(self, dt: float):
         self.compute_temp()
 
+    @classmethod
+    def sun_distance(cls, t: np.ndarray) -> np.ndarray:
+        """Sun distance [AU] used at mission time(s) t [s]."""
+        return Orbit.sun_distance(t) if cls.R_AU is None else cls.R_AU
+
     def compute_temp(self) -> float:
         phi = self.sim.models.traverse.phi
-        self.surface_temp = self._compute_surface_temp(phi, self.R_AU)
-
-    def _compute_surface_temp(self, phi: float, r: float) -> float:
-        assert 0.3075 <= r <= 0.4667
-        T_COLD = 110  # [K]
-        if 90 <= phi <= 270 or -270 <= phi <= -90:
-            return K_to_degC(T_COLD)
-        T_subsolar = 407 + (8 / np.sqrt(r))
-        T_K = (
-            T_subsolar * np.cos(np.deg2rad(phi)) ** 0.25
-            + T_COLD * (np.abs(phi) / 90) ** 3
-        )
-        return K_to_degC(T_K)
-
-    def _phi_from_surface_temp(self, temp: float, r: float) -> float:
-        sol = root_scalar(
-            lambda phi: self.compute_surface_temp(phi, r) - temp, bracket=(0, 180)
-        )
-        assert sol.converged
-        return sol.root
+        self.surface_temp = surface_temp(phi, self.sun_distance(self.sim.t))
@@ -0,0 +1,197 @@
+"""Thermal networks of lumped nodes joined by conductive and radiative links.
+
+A network is declared as data: nodes with a heat capacity and fixed heat
+input, boundary nodes held at a set temperature (e.g. ground and sky), and
+links between pairs of nodes by name. The net heat into free node i is
+
+    Q_i = heat_i + sum_j G_ij (T_j - T_i) + sigma sum_j R_ij (T_j^4 - T_i^4)
+
+where G_ij is a conductance [W/K] and R_ij = A F eps is a radiative exchange
+area [m^2]. Both are stored as sparse matrices, so steady-state and transient
+solves of hundreds of nodes take milliseconds:
+
+    net = meta_network(ground_temp=50)
+    temps = net.steady_state()  # {"body": ..., "panel": ...}
+"""
+
+from dataclasses import dataclass
+
+import numpy as np
+from scipy import sparse
+from scipy.sparse.linalg import spsolve
+
+from .utils import degC_to_K, K_to_degC
+from .thermal import LumpedThermal, PERIHELION_SOLAR_FLUX, STEF_BOLTZ, T_SKY, FRONT
+
+TEMP_TOL = 1e-6  # [K], Max Newton update to count as converged
+MAX_ITERS = 50
+T_FLOOR = 1  # [K], Lower bound on Newton iterates
+MAX_STEP = 100  # [K], Largest steady-state Newton update, to avoid overshoot
+
+
+@dataclass
+class Node:
+    name: str
+    capacity: float = 0  # [J/K], Zero for nodes without thermal mass
+    heat: float = 0  # [W], Absorbed or internally generated
+    temp: float = None  # [degC], Set for boundary nodes held at a temperature
+
+
+@dataclass
+class Link:
+    a: str
+    b: str
+    value: float  # [W/K] for conduction, [m^2] exchange area for radiation
+
+
+class ThermalNetwork:
+    """Nodes and links of a thermal network, compiled to sparse matrices."""
+
+    def __init__(
+        self, nodes: list[Node], conduction: list[Link], radiation: list[Link]
+    ):
+        self.nodes = nodes
+        self.conduction = conduction
+        self.radiation = radiation
+
+        names = [node.name for node in nodes]
+        if len(set(names)) != len(names):
+            raise ValueError("Node names must be unique")
+        self.index = {name: i for i, name in enumerate(names)}
+        is_free = np.array([node.temp is None for node in nodes])
+        self.free = np.flatnonzero(is_free)
+        self.fixed = np.flatnonzero(~is_free)
+
+        self.capacity = np.array([node.capacity for node in nodes], np.float64)
+        self.heat = np.array([node.heat for node in nodes], np.float64)
+        self.fixed_temps = degC_to_K(
+            np.array([nodes[i].temp for i in self.fixed], np.float64)
+        )
+        self.G = self._laplacian(conduction)
+        self.R = STEF_BOLTZ * self._laplacian(radiation)
+        # Free-free blocks, and free-fixed blocks that fold into the heat input
+        self._G_ff = self.G[self.free][:, self.free]
+        self._R_ff = self.R[self.free][:, self.free]
+        self._G_fb = self.G[self.free][:, self.fixed]
+        self._R_fb = self.R[self.free][:, self.fixed]
+
+    def __len__(self) -> int:
+        return len(self.nodes)
+
+    def _laplacian(self, links: list[Link]) -> sparse.csr_matrix:
+        """Weighted graph Laplacian L, so that sum_j w_ij (x_j - x_i) = -L x."""
+        n = len(self.nodes)
+        a = np.array([self.index[link.a] for link in links], dtype=np.intp)
+        b = np.array([self.index[link.b] for link in links], dtype=np.intp)
+        w = np.array([link.value for link in links], np.float64)
+        adj = sparse.coo_matrix((w, (a, b)), shape=(n, n))
+        adj = (adj + adj.T).tocsr()
+        degree = np.asarray(adj.sum(axis=1)).ravel()
+        return (sparse.diags(degree) - adj).tocsr()
+
+    def _free_heat(self, heat, fixed_temps):
+        """Heat into the free nodes from fixed inputs and boundary nodes [W]."""
+        return heat[self.free] - self._G_fb @ fixed_temps - self._R_fb @ fixed_temps**4
+
+    def _net_heat(self, T, q_in):
+        """Net heat into the free nodes [W] and its (sparse) Jacobian [W/K]."""
+        T3 = T**3
+        Q = q_in - self._G_ff @ T - self._R_ff @ (T3 * T)
+        J = -self._G_ff - self._R_ff @ sparse.diags(4 * T3)
+        return Q, J
+
+    def _temps(self, T_free, fixed_temps) -> dict[str, float]:
+        T = np.empty(len(self))
+        T[self.free] = T_free
+        T[self.fixed] = fixed_temps
+        return dict(zip(self.index, K_to_degC(T)))
+
+    def steady_state(
+        self, heat: np.ndarray = None, fixed_temps: np.ndarray = None
+    ) -> dict[str, float]:
+        """Temps [degC] of every node where the net heat into each is zero.
+
+        ``heat`` [W] and ``fixed_temps`` [degC] override the node values, for
+        all nodes and the boundary nodes respectively.
+        """
+        heat = self.heat if heat is None else heat
+        fixed_temps = (
+            self.fixed_temps if fixed_temps is None else degC_to_K(fixed_temps)
+        )
+        q_in = self._free_heat(heat, fixed_temps)
+
+        # Starting hot means radiation is overestimated rather than missed
+        T = np.full(len(self.free), max(fixed_temps.max(initial=0), 293.15))
+        for _ in range(MAX_ITERS):
+            Q, J = self._net_heat(T, q_in)
+            dT = np.clip(spsolve(J.tocsc(), -Q), -MAX_STEP, MAX_STEP)
+            T = np.maximum(T + dT, T_FLOOR)
+            if np.all(np.abs(dT) <= TEMP_TOL):
+                break
+        else:
+            raise RuntimeError("Steady state did not converge")
+        return self._temps(T, fixed_temps)
+
+    def transient(
+        self,
+        dt: float,
+        heats: np.ndarray,
+        fixed_temps: np.ndarray = None,
+        initial: dict[str, float] = None,
+    ) -> np.ndarray:
+        """Temps [degC] (T, N) of every node over T time-steps.
+
+        ``heats`` [W] is (T, N), or (N,) for constant heat inputs with T the
+        length of ``fixed_temps`` [degC] (T, n_fixed). Nodes start at
+        ``initial``, or their steady state for the first step's inputs, and
+        are stepped with linearly implicit Euler so any dt is stable.
+        """
+        n_steps = len(heats) if np.ndim(heats) == 2 else len(fixed_temps)
+        heats = np.broadcast_to(heats, (n_steps, len(self)))
+        fixed_temps = (
+            np.broadcast_to(self.fixed_temps, (n_steps, len(self.fixed)))
+            if fixed_temps is None
+            else degC_to_K(np.asarray(fixed_temps, np.float64))
+        )
+        if initial is None:
+            initial = self.steady_state(heats[0], K_to_degC(fixed_temps[0]))
+        T = degC_to_K(np.array([initial[self.nodes[i].name] for i in self.free]))
+
+        C = sparse.diags(self.capacity[self.free] / dt)
+        out = np.empty((n_steps, len(self)))
+        out[0, self.free] = T
+        out[:, self.fixed] = fixed_temps
+        for k in range(1, n_steps):
+            Q, J = self._net_heat(T, self._free_heat(heats[k], fixed_temps[k]))
+            T = np.maximum(T + spsolve((C - J).tocsc(), Q), T_FLOOR)
+            out[k, self.free] = T
+        return K_to_degC(out)
+
+
+def meta_network(
+    ground_temp: float = 50,
+    solar_flux: float = PERIHELION_SOLAR_FLUX,
+    sun_vec: np.ndarray = np.array([1, 0, 0]),
+    **overrides,
+) -> ThermalNetwork:
+    """The two-node META body and solar panel configuration as a network.
+
+    Reference case matching ``LumpedThermal`` and ``envelope.steady_state``,
+    and a starting point for splitting the body into more nodes.
+    """
+    c = LumpedThermal.coefficients(**overrides)
+    flux = solar_flux * FRONT.illuminated_area(sun_vec)
+    nodes = [
+        Node("body", c.cap_body, c.sun_body * flux + c.q_gen_body),
+        Node("panel", c.cap_panel, c.sun_panel * flux),
+        Node("ground", temp=ground_temp),
+        Node("sky", temp=K_to_degC(T_SKY)),
+    ]
+    conduction = [Link("body", "panel", c.kappa)]
+    radiation = [
+        Link("body", "ground", c.ground_body / STEF_BOLTZ),
+        Link("body", "sky", c.sky_body / STEF_BOLTZ),
+        Link("panel", "ground", c.ground_panel / STEF_BOLTZ),
+        Link("panel", "sky", c.sky_panel / STEF_BOLTZ),
+    ]
+    return ThermalNetwork(nodes, conduction, radiation)
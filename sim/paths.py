@@ -1,15 +1,32 @@
+import hashlib
+import json
+import os
+import pathlib
 from dataclasses import dataclass, field
-from itertools import accumulate
+from functools import cached_property
 
 import numpy as np
 from scipy.interpolate import splprep, splev
 
-from utils import snap_angle_range
+from .utils import snap_angle_range
 
 R_EQUAT = 2440.5  # [km], Equatorial radius (semi-major)
 R_POLAR = 2438.3  # [km], Polar radius (semi-minor)
 R_CIRC = (R_EQUAT + R_POLAR) / 2  # [km], Radius to use for circular calcs
 
+# Pixel (x, y) polylines on the paths image: "traverse" trimmed to join up
+# into the current route, and "segments" the full candidate segments
+PATHS_FILE = pathlib.Path(__file__).parent / "data" / "paths.json"
+
+
+def load_pixel_paths(kind: str, file: "str | os.PathLike" = PATHS_FILE) -> dict:
+    """Named pixel polylines of one kind from the paths file."""
+    with open(file) as f:
+        return {
+            name: [tuple(pixel) for pixel in pixels]
+            for name, pixels in json.load(f)[kind].items()
+        }
+
 
 def _from_xy_to_latlon(x: float, y: float) -> tuple[float, float]:
     """Convert from x-y to latitude, longitude."""
@@ -18,6 +35,50 @@ def _from_xy_to_latlon(x: float, y: float) -> tuple[float, float]:
     return np.rad2deg(lat_rad), np.rad2deg(lon_rad)
 
 
+def _from_latlon_to_xyz(lat: float, lon: float) -> np.ndarray:
+    """Convert from latitude, longitude to x-y-z, stacked along the first axis."""
+    lat_rad, lon_rad = np.deg2rad(lat), np.deg2rad(lon)
+    return R_CIRC * np.array(
+        [
+            np.cos(lat_rad) * np.cos(lon_rad),
+            np.cos(lat_rad) * np.sin(lon_rad),
+            np.sin(lat_rad),
+        ]
+    )
+
+
+def _bearing_from_xy_tangent(lat: float, lon: float, dx: float, dy: float) -> float:
+    """Bearing from North of an x-y direction of travel at a location."""
+    lon_rad = np.deg2rad(lon)
+    # North is radially outwards from the pole, East is anti-clockwise
+    v_north = dx * np.cos(lon_rad) + dy * np.sin(lon_rad)
+    v_east = -dx * np.sin(lon_rad) + dy * np.cos(lon_rad)
+    # Undo the projection's foreshortening of North-South ground distance
+    v_north = v_north / np.abs(np.sin(np.deg2rad(lat)))
+    return np.rad2deg(np.arctan2(v_east, v_north))
+
+
+def _haversine(lat_1: float, lon_1: float, lat_2: float, lon_2: float) -> float:
+    """Haversine formula for distance on sphere, works on arrays."""
+    lat_1, lon_1 = np.deg2rad(lat_1), np.deg2rad(lon_1)
+    lat_2, lon_2 = np.deg2rad(lat_2), np.deg2rad(lon_2)
+    a = np.sin((lat_2 - lat_1) / 2) ** 2
+    b = np.sin((lon_2 - lon_1) / 2) ** 2
+    c = a + b * np.cos(lat_1) * np.cos(lat_2)
+    return R_CIRC * 2 * np.arctan2(np.sqrt(c), np.sqrt(1 - c))
+
+
+def _bearing(lat_a: float, lon_a: float, lat_b: float, lon_b: float) -> float:
+    """Bearing from North (0 deg is North, 90 deg is East), works on arrays."""
+    a_lat, b_lat = np.deg2rad(lat_a), np.deg2rad(lat_b)
+    delta_lon = np.deg2rad(lon_b - lon_a)
+    y = np.cos(b_lat) * np.sin(delta_lon)
+    x = (np.cos(a_lat) * np.sin(b_lat)) - (
+        np.sin(a_lat) * np.cos(b_lat) * np.cos(delta_lon)
+    )
+    return np.rad2deg(np.arctan2(y, x))
+
+
 @dataclass
 class Location:
     lat: float
@@ -25,77 +86,227 @@ class Location:
     xyz: np.array = field(init=False)
 
     def __post_init__(self):
-        lat_rad, lon_rad = np.deg2rad(self.lat), np.deg2rad(self.lon)
-        self.xyz = R_CIRC * np.array(
-            [
-                np.cos(lat_rad) * np.cos(lon_rad),
-                np.cos(lat_rad) * np.sin(lon_rad),
-                np.sin(lat_rad),
-            ]
-        )
+        self.xyz = _from_latlon_to_xyz(self.lat, self.lon)
 
     @classmethod
     def from_xy(cls, x: float, y: float) -> "Location":
         return Location(*_from_xy_to_latlon(x, y))
 
+    @classmethod
+    def _from_parts(cls, lat: float, lon: float, xyz: np.ndarray) -> "Location":
+        """Build from an already known x-y-z, skipping the trig."""
+        loc = cls.__new__(cls)
+        loc.lat, loc.lon, loc.xyz = lat, lon, xyz
+        return loc
+
     def distance_to(self, b: "Location") -> float:
         """Haversine formula for distance on sphere"""
-        lat_1, lon_1 = np.deg2rad(self.lat), np.deg2rad(self.lon)
-        lat_2, lon_2 = np.deg2rad(b.lat), np.deg2rad(b.lon)
-        a = np.sin((lat_2 - lat_1) / 2) ** 2
-        b = np.sin((lon_2 - lon_1) / 2) ** 2
-        c = a + b * np.cos(lat_1) * np.cos(lat_2)
-        return R_CIRC * 2 * np.arctan2(np.sqrt(c), np.sqrt(1 - c))
+        return _haversine(self.lat, self.lon, b.lat, b.lon)
 
     def bearing_to(self, b: "Location") -> float:
         """Bearing from North (0 deg is North, 90 deg is East)."""
-        a_lat, b_lat = np.deg2rad(self.lat), np.deg2rad(b.lat)
-        delta_lon = np.deg2rad(b.lon - self.lon)
-        y = np.cos(b_lat) * np.sin(delta_lon)
-        x = (np.cos(a_lat) * np.sin(b_lat)) - (
-            np.sin(a_lat) * np.cos(b_lat) * np.cos(delta_lon)
-        )
-        return np.rad2deg(np.arctan2(y, x))
+        return _bearing(self.lat, self.lon, b.lat, b.lon)
 
     @staticmethod
     def subtract_longitudes(lon_a: float, lon_b: float) -> float:
         return snap_angle_range(lon_a - lon_b)
 
 
+@dataclass
+class LocationArray:
+    """Many locations stored as arrays, the vectorized version of Location.
+
+    ``distance_to`` and ``bearing_to`` broadcast against another
+    LocationArray of the same length or a single Location.
+    """
+
+    lats: np.array
+    lons: np.array
+    xyzs: np.array = field(init=False, repr=False)  # (3, N)
+
+    def __post_init__(self):
+        self.lats = np.asarray(self.lats, dtype=np.float64)
+        self.lons = np.asarray(self.lons, dtype=np.float64)
+        self.xyzs = _from_latlon_to_xyz(self.lats, self.lons)
+
+    @classmethod
+    def from_xy(cls, x: np.ndarray, y: np.ndarray) -> "LocationArray":
+        return LocationArray(*_from_xy_to_latlon(x, y))
+
+    def __len__(self) -> int:
+        return len(self.lats)
+
+    def __getitem__(self, i):
+        if isinstance(i, (int, np.integer)):
+            return Location._from_parts(self.lats[i], self.lons[i], self.xyzs[:, i])
+        return LocationArray(self.lats[i], self.lons[i])
+
+    def __iter__(self):
+        return (self[i] for i in range(len(self)))
+
+    def distance_to(self, b: "LocationArray | Location") -> np.ndarray:
+        """Haversine formula for distance on sphere"""
+        return _haversine(self.lats, self.lons, *_lat_lon(b))
+
+    def bearing_to(self, b: "LocationArray | Location") -> np.ndarray:
+        """Bearing from North (0 deg is North, 90 deg is East)."""
+        return _bearing(self.lats, self.lons, *_lat_lon(b))
+
+    subtract_longitudes = staticmethod(Location.subtract_longitudes)
+
+    def segment_distances(self) -> np.ndarray:
+        """Distance from each point to the next, length N-1."""
+        return _haversine(self.lats[:-1], self.lons[:-1], self.lats[1:], self.lons[1:])
+
+    def segment_bearings(self) -> np.ndarray:
+        """Bearing from each point to the next, length N-1."""
+        return _bearing(self.lats[:-1], self.lons[:-1], self.lats[1:], self.lons[1:])
+
+    def cumulative_distances(self) -> np.ndarray:
+        """Distance along the points from the first one, length N."""
+        return np.concatenate(([0.0], np.cumsum(self.segment_distances())))
+
+    def pairwise_distances(self, b: "LocationArray | None" = None) -> np.ndarray:
+        """(N, M) matrix of distances from every point to every point of b."""
+        b = self if b is None else b
+        return _haversine(
+            self.lats[:, np.newaxis], self.lons[:, np.newaxis], b.lats, b.lons
+        )
+
+
+def _lat_lon(loc: "Location | LocationArray") -> tuple[np.ndarray, np.ndarray]:
+    if isinstance(loc, LocationArray):
+        return loc.lats, loc.lons
+    return loc.lat, loc.lon
+
+
 @dataclass
 class Path:
+    INDEX_STEP = 0.1  # [km], Spacing of the arc-length index
+
     name: str
     lats: np.array
     lons: np.array
 
     xyzs: np.array = field(init=False)
-    points: list[Location] = field(init=False, repr=False)
+    points: LocationArray = field(init=False, repr=False)
     sections: int = field(init=False)
 
     def __post_init__(self):
-        self.points = []
-        for lat, lon in zip(self.lats, self.lons):
-            self.points.append(Location(lat, lon))
-        self.xyzs = np.vstack([p.xyz for p in self.points]).transpose()
-        self.sections = len(self.points)
+        self._init_points()
 
         # Compute distances along path
-        self._dists = np.fromiter(
-            accumulate(
-                (a.distance_to(b) for a, b in zip(self.points, self.points[1:])),
-                initial=0,
-            ),
-            dtype=np.float64,
-        )
+        self._dists = self.points.cumulative_distances()
         # Fit function from distance along path to position
         k = 3 if self.sections > 3 else 1
         self._tck, _u_orig = splprep(self.xyzs[:2, :], u=self._dists, s=0, k=k)
 
+    def _init_points(self):
+        self.points = LocationArray(self.lats, self.lons)
+        self.xyzs = self.points.xyzs
+        self.sections = len(self.points)
+
+    def save(self, file: "str | os.PathLike"):
+        """Save points, distances and the fitted spline to an .npz file."""
+        t, c, k = self._tck
+        np.savez(
+            file,
+            name=self.name,
+            lats=self.lats,
+            lons=self.lons,
+            dists=self._dists,
+            tck_t=t,
+            tck_c=np.array(c),
+            tck_k=k,
+        )
+
+    @classmethod
+    def load(cls, file: "str | os.PathLike") -> "Path":
+        """Load a path saved with ``save``, without re-fitting the spline."""
+        with np.load(file) as data:
+            path = cls.__new__(cls)
+            path.name = str(data["name"])
+            path.lats, path.lons = data["lats"], data["lons"]
+            path._init_points()
+            path._dists = data["dists"]
+            path._tck = [data["tck_t"], list(data["tck_c"]), int(data["tck_k"])]
+        return path
+
     def total_distance(self):
         return self._dists[-1]
 
-    def point_at_dist(self, dist) -> Location:
-        return Location.from_xy(*splev(dist, self._tck))
+    @cached_property
+    def _index(self) -> tuple[float, dict[str, np.ndarray]]:
+        """Dense arc-length table of lat, lon, x-y-z and bearing.
+
+        Sampled from the spline every ~INDEX_STEP along the path, with the
+        bearing from the spline's tangent. Angles are unwrapped so they can be
+        linearly interpolated. Returns (samples per km, columns).
+        """
+        total = self.total_distance()
+        n = int(np.ceil(total / self.INDEX_STEP)) + 1
+        dists = np.linspace(0, total, n)
+        x, y = splev(dists, self._tck)
+        dx, dy = splev(dists, self._tck, der=1)
+        lat, lon = _from_xy_to_latlon(x, y)
+        columns = {
+            "lat": lat,
+            "lon": np.unwrap(lon, period=360),
+            "xyz": _from_latlon_to_xyz(lat, lon),
+            "bearing": np.unwrap(
+                _bearing_from_xy_tangent(lat, lon, dx, dy), period=360
+            ),
+        }
+        return (n - 1) / total, columns
+
+    def _index_position(self, dists: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+        """Index table interval and fraction along it of distance(s)."""
+        scale, columns = self._index
+        u = np.asarray(dists, dtype=np.float64) * scale
+        i = np.clip(u.astype(np.intp), 0, len(columns["lat"]) - 2)
+        return i, u - i
+
+    def _interp_index(self, dists: np.ndarray, *names: str) -> list[np.ndarray]:
+        """Linearly interpolate index columns, extrapolating off either end."""
+        columns = self._index[1]
+        i, f = self._index_position(dists)
+        values = []
+        for name in names:
+            col = columns[name]
+            lo = col[..., i]
+            values.append(lo + f * (col[..., i + 1] - lo))
+        return values
+
+    def points_at_dists(
+        self, dists: np.ndarray
+    ) -> tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+        """Lat, lon, x-y-z (3, ...) and bearing at distance(s) along the path."""
+        lat, lon, xyz, bearing = self._interp_index(
+            dists, "lat", "lon", "xyz", "bearing"
+        )
+        return lat, snap_angle_range(lon), xyz, snap_angle_range(bearing)
+
+    def lons_at_dists(self, dists: np.ndarray) -> np.ndarray:
+        """Longitude at distance(s) along the path."""
+        return snap_angle_range(self._interp_index(dists, "lon")[0])
+
+    def lons_and_slopes_at_dists(
+        self, dists: np.ndarray
+    ) -> tuple[np.ndarray, np.ndarray]:
+        """Unwrapped longitude [deg] and its rate of change [deg/km] at distance(s)
+        along the path."""
+        scale, columns = self._index
+        i, f = self._index_position(dists)
+        lo = columns["lon"][i]
+        step = columns["lon"][i + 1] - lo
+        return lo + f * step, step * scale
+
+    def point_at_dist(self, dist: float) -> Location:
+        return self.point_and_bearing_at_dist(dist)[0]
+
+    def point_and_bearing_at_dist(self, dist: float) -> tuple[Location, float]:
+        lat, lon, xyz, bearing = self.points_at_dists(dist)
+        return Location._from_parts(lat, lon, xyz), bearing
 
 
 class PathsImage:
@@ -108,12 +319,21 @@ class PathsImage:
     SMOOTH_FACTOR = 0
     POINTS_PER_PATH = 201
 
+    PATHS = load_pixel_paths("traverse")
     TRAVERSE_PATHS = ["Beta", "Alpha_3", "Alpha_2", "Gam_2", "Delta_2"]
 
+    CACHE_DIR = pathlib.Path(__file__).parent / ".cache"
+    CACHE_VERSION = 1  # Bump when the parsing below changes
+
     @classmethod
     def parse_path_from_pixels(cls, name: str) -> Path:
         # Reverse points b/c traversal is in opposite direction
-        points = np.array(cls.PATHS[name][::-1]).T
+        return cls.path_from_pixels(name, cls.PATHS[name][::-1])
+
+    @classmethod
+    def path_from_pixels(cls, name: str, pixels: list[tuple[int, int]]) -> Path:
+        """Path through pixel (x, y) points on the image, in that order."""
+        points = np.array(pixels, dtype=np.float64).T
 
         # Centre x-y and flip y b/c pixels go downwards
         points[0] -= cls.CENTRE[0]
@@ -122,7 +342,7 @@ class PathsImage:
         points = points * (R_CIRC / cls.RADIUS)
 
         # Smooth out path and interpolate
-        tck, u_orig = splprep(points, s=cls.SMOOTH_FACTOR)
+        tck, u_orig = splprep(points, s=cls.SMOOTH_FACTOR, k=min(3, len(pixels) - 1))
         u_new = np.linspace(0, 1, cls.POINTS_PER_PATH)
         points = splev(u_new, tck)
 
@@ -134,132 +354,41 @@ class PathsImage:
         return [cls.parse_path_from_pixels(name) for name in cls.TRAVERSE_PATHS]
 
     @classmethod
-    def get_global_path(cls) -> Path:
+    def get_global_path(cls, use_cache: bool = True) -> Path:
+        """Join the traverse paths into one, cached on disk between runs."""
+        if not use_cache:
+            return cls._parse_global_path()
+
+        cache_file = cls.CACHE_DIR / f"global_path_{cls._cache_key()}.npz"
+        try:
+            return Path.load(cache_file)
+        except (OSError, ValueError, KeyError):
+            pass
+        path = cls._parse_global_path()
+        cls.CACHE_DIR.mkdir(parents=True, exist_ok=True)
+        # Write then rename so concurrent runs never see a partial file
+        tmp_file = cache_file.with_suffix(f".{os.getpid()}.tmp.npz")
+        path.save(tmp_file)
+        os.replace(tmp_file, cache_file)
+        return path
+
+    @classmethod
+    def _parse_global_path(cls) -> Path:
         all_paths = cls.get_all_traverse_paths()
         lats = np.hstack([path.lats[:-1] for path in all_paths])
         lons = np.hstack([path.lons[:-1] for path in all_paths])
         return Path(" → ".join(path.name for path in all_paths), lats, lons)
 
-    PATHS = {
-        "Beta": [
-            (369, 84),
-            (386, 83),
-            (392, 79),
-            (403, 87),
-            (413, 99),
-            (419, 104),
-            (428, 106),
-            (434, 117),
-            (443, 122),
-            (452, 133),
-            (464, 134),
-            (471, 150),
-            (477, 168),
-            (483, 193),
-            (486, 214),
-            (478, 234),
-            (475, 244),
-            (471, 256),
-            (471, 272),
-            (473, 283),
-            (467, 293),
-            (462, 302),
-            (452, 310),
-            (443, 320),
-            (440, 330),
-            (431, 330),
-            (420, 329),
-            (418, 334),
-            (411, 334),
-            (406, 342),
-            (406, 348),
-            (393, 353),
-            (385, 365),
-            (368, 364),
-            (361, 358),
-            (354, 363),
-            (345, 366),
-            (341, 371),
-            (334, 371),
-        ],
-        "Alpha_3": [
-            (201, 148),
-            (197, 137),
-            (203, 133),
-            (202, 124),
-            (207, 122),
-            (201, 110),
-            (221, 105),
-            (232, 93),
-            (243, 85),
-            (252, 69),
-            (269, 65),
-            (280, 58),
-            (298, 60),
-            (314, 60),
-            (327, 68),
-            (337, 68),
-            (344, 73),
-            (349, 73),
-            (352, 77),
-            (360, 81),
-            (369, 84),
-        ],
-        "Alpha_2": [
-            (170, 314),
-            (165, 307),
-            (167, 294),
-            (164, 288),
-            (161, 276),
-            (155, 275),
-            (154, 262),
-            (149, 254),
-            (149, 243),
-            (154, 235),
-            (149, 227),
-            (151, 213),
-            (146, 197),
-            (146, 179),
-            (156, 171),
-            (163, 170),
-            (170, 160),
-            (180, 153),
-            (195, 151),
-            (201, 148),
-        ],
-        "Gam_2": [
-            (302, 295),
-            (287, 296),
-            (279, 300),
-            (273, 307),
-            (266, 306),
-            (261, 299),
-            (250, 303),
-            (250, 308),
-            (244, 308),
-            (239, 306),
-            (230, 313),
-            (221, 318),
-            (212, 317),
-            (203, 320),
-            (193, 321),
-            (185, 317),
-            (170, 314),
-        ],
-        "Delta_2": [
-            (378, 256),
-            (377, 263),
-            (370, 267),
-            (362, 269),
-            (354, 273),
-            (349, 278),
-            (338, 280),
-            (331, 277),
-            (325, 272),
-            (316, 271),
-            (308, 273),
-            (306, 282),
-            (303, 289),
-            (302, 295),
-        ],
-    }
+    @classmethod
+    def _cache_key(cls) -> str:
+        """Hash of everything the parsed global path depends on."""
+        inputs = (
+            cls.CACHE_VERSION,
+            cls.PATHS,
+            cls.TRAVERSE_PATHS,
+            cls.CENTRE,
+            cls.RADIUS,
+            cls.SMOOTH_FACTOR,
+            cls.POINTS_PER_PATH,
+        )
+        return hashlib.sha256(repr(inputs).encode()).hexdigest()[:16]
@@ -0,0 +1,160 @@
+import numpy as np
+import matplotlib.pyplot as plt
+
+from .utils import SECS_PER_DAY
+from .power import Power
+from .recorder import Recorder
+
+plt.style.use("ggplot")
+plt.rcParams.update(
+    {
+        "figure.autolayout": True,
+        "font.family": "sans-serif",
+        "font.sans-serif": "PT Sans",
+    }
+)
+
+
+def decimate(x: np.ndarray, y: np.ndarray, buckets: int) -> tuple:
+    """Points of a series to draw at most 2 per bucket, keeping its extremes.
+
+    The series is split into equal buckets and only the min and max of
+    each are kept, in order, so spikes still show at any zoom-out. With a
+    bucket per pixel column it looks the same as drawing every point.
+    """
+    n = len(y)
+    if n <= 2 * buckets:
+        return x, y
+    size = -(-n // buckets)
+    y = np.asarray(y)
+    padded = np.pad(y, (0, buckets * size - n), mode="edge").reshape(buckets, -1)
+    starts = np.arange(buckets) * size
+    lo = starts + np.argmin(padded, axis=1)
+    hi = starts + np.argmax(padded, axis=1)
+    idx = np.sort(np.stack([lo, hi], axis=1), axis=1).ravel()
+    idx = np.unique(np.concatenate([[0], np.minimum(idx, n - 1), [n - 1]]))
+    return np.asarray(x)[idx], y[idx]
+
+
+def decimate_band(
+    x: np.ndarray, lower: np.ndarray, upper: np.ndarray, buckets: int
+) -> tuple:
+    """Band between two series, from at most ``buckets`` buckets of each.
+
+    Each bucket keeps the lowest of the lower and highest of the upper
+    series, so the band never looks narrower than it is.
+    """
+    n = len(x)
+    if n <= 2 * buckets:
+        return x, lower, upper
+    starts = np.arange(0, n, -(-n // buckets))
+    return (
+        np.asarray(x)[starts],
+        np.minimum.reduceat(lower, starts),
+        np.maximum.reduceat(upper, starts),
+    )
+
+
+def daily_sums(t: np.ndarray, values: np.ndarray) -> tuple:
+    """Mission days and the sum of values over each, from times t [s]."""
+    day = (np.asarray(t) // SECS_PER_DAY).astype(np.intp)
+    sums = np.bincount(day, weights=values)
+    return np.arange(len(sums)), sums
+
+
+def _buckets(ax) -> int:
+    """One bucket per pixel column of the axes."""
+    return max(int(ax.bbox.width), 1)
+
+
+def _plot(ax, x: np.ndarray, y: np.ndarray, **kwargs):
+    return ax.plot(*decimate(x, y, _buckets(ax)), **kwargs)
+
+
+def plot_traversal(rec: Recorder):
+    days = rec["t"] / SECS_PER_DAY
+    fig, axs = plt.subplots(2, 2, num="traversal", sharex="all", figsize=(10, 6))
+    fig.suptitle("Traversal")
+    _plot(axs[0, 0], days, rec["lat"])
+    axs[0, 0].set_title("Latitude")
+    axs[0, 0].set_ylabel("[deg]")
+    _plot(axs[1, 0], days, rec["lon"])
+    axs[1, 0].set_title("Longitude")
+    axs[1, 0].set_ylabel("[deg]")
+    _plot(axs[0, 1], days, rec["speed"])
+    axs[0, 1].set_title("Speed")
+    axs[0, 1].set_ylabel("[m/s]")
+    _plot(axs[1, 1], days, np.unwrap(rec["bearing"], period=360))
+    axs[1, 1].set_title("Bearing")
+    axs[1, 1].set_ylabel("[deg]")
+    for i in range(axs.shape[-1]):
+        axs[-1, i].set_xlabel("Mission Time [days]")
+
+
+def plot_thermal(rec: Recorder):
+    days = rec["t"] / SECS_PER_DAY
+    fig, axs = plt.subplots(2, 1, num="thermal", sharex="all", figsize=(6, 6))
+    fig.suptitle("Thermal")
+    _plot(axs[0], days, rec["surf_temp"])
+    axs[0].set_title("Surface Temp")
+    axs[0].set_ylabel("[degC]")
+    _plot(axs[1], days, rec["phi"])
+    axs[1].set_title("Subsolar Phi Angle")
+    axs[1].set_ylabel("[deg]")
+    axs[1].set_xlabel("Mission Time [day]")
+
+
+def plot_sun(rec: Recorder):
+    days = rec["t"] / SECS_PER_DAY
+    fig, axs = plt.subplots(2, 1, num="sun", sharex="all", figsize=(10, 6))
+    _plot(axs[0], days, rec["sun_azimuth"])
+    axs[0].set_title("Local Sun Azimuth")
+    axs[0].set_ylabel("[deg]")
+    _plot(axs[1], days, rec["sun_elevation"])
+    axs[1].set_title("Sun Elevation")
+    axs[1].set_ylabel("[deg]")
+    axs[1].set_xlabel("Mission Time [day]")
+    plt.show()
+
+
+def plot_power_gen(rec: Recorder):
+    days = rec["t"] / SECS_PER_DAY
+    fig, ax = plt.subplots(num="power-gen", sharex="all", figsize=(10, 6))
+    power_gen = rec["power_gen"]
+    # Bounds if the flux were pinned at either extreme throughout
+    per_flux = power_gen / Power.solar_flux(rec["t"])
+    min_power_gen = per_flux * Power.MIN_SOLAR_FLUX
+    max_power_gen = per_flux * Power.MAX_SOLAR_FLUX
+    ax.fill_between(
+        *decimate_band(days, min_power_gen, max_power_gen, _buckets(ax)), alpha=0.5
+    )
+    _plot(ax, days, power_gen)
+    ax.set_title("Generated Solar Power")
+    ax.set_ylabel("[W]")
+    ax.set_xlabel("Mission Time [day]")
+
+
+def plot_stoppage_time(rec: Recorder):
+    """Plot possible stoppage time per mission day."""
+    days = rec["t"] / SECS_PER_DAY
+    ts, t_excess = daily_sums(rec["t"], rec["t_excess"])
+    t_excess /= 60 * 60  # Convert secs to hours
+
+    fig, axs = plt.subplots(2, 1, num="stoppage-time", sharex="all")
+    _plot(axs[0], days, rec["speed"])
+    axs[0].set_ylabel("Speed [m/s]")
+    axs[0].set_title("Required Speed w/ No Stopping")
+    axs[1]._get_lines.get_next_color()
+    axs[1].bar(ts, t_excess, align="center", color=axs[1]._get_lines.get_next_color())
+    axs[1].set_xlabel("Mission Day")
+    axs[1].set_ylabel("Stoppage Time [hour]")
+    axs[1].set_title("Maximum Stoppage Time Per Mission Day")
+
+
+PLOTS = {
+    "traversal": plot_traversal,
+    "thermal": plot_thermal,
+    "sun": plot_sun,
+    "power_gen": plot_power_gen,
+    "stoppage_time": plot_stoppage_time,
+}
@@ -1,30 +1,43 @@
 import numpy as np
 
-from utils import Model, Plane
+from .utils import Model, Plane, PlaneSet
+from .mercury import Orbit
 
 
 class Power(Model):
+    INPUTS = ("sun.vec", "t")
+    OUTPUTS = ("received", "generated")
+
     # [W / m^2]
     MIN_SOLAR_FLUX = 6278  # Minimum at aphelion
     MAX_SOLAR_FLUX = 13000
-    SOLAR_FLUX = MIN_SOLAR_FLUX
+    SOLAR_FLUX = None  # Fixed flux, or None to follow Mercury's orbit
 
     GEN_EFFICIENCY = 0.2 * 0.8
-    SOLAR_PANELS = [
-        Plane(0.2 * 0.3, [1, 0, 0]),
-        Plane(0.2 * 0.3, [1, 0, 0]),
-        Plane(0.08, [0, 1, 0]),
-        Plane(0.08, [0, -1, 0]),
-    ]
+    SOLAR_PANELS = PlaneSet.from_planes(
+        [
+            Plane(0.2 * 0.3, [1, 0, 0]),
+            Plane(0.2 * 0.3, [1, 0, 0]),
+            Plane(0.08, [0, 1, 0]),
+            Plane(0.08, [0, -1, 0]),
+        ]
+    )
 
     def __init__(self, sim):
         super().__init__(sim)
         self.step(0)
 
     def step(self, dt: float):
-        sun_vec = self.sim.models.sun.vec
-        tot_area = 0
-        for plane in self.SOLAR_PANELS:
-            tot_area += plane.projected_area(sun_vec)
-        self.received = self.SOLAR_FLUX * tot_area
+        self.received = self.received_from_sun(self.sim.models.sun.vec, self.sim.t)
         self.generated = self.GEN_EFFICIENCY * self.received
+
+    @classmethod
+    def solar_flux(cls, t: np.ndarray) -> np.ndarray:
+        """Solar flux [W/m^2] used at mission time(s) t [s]."""
+        return Orbit.solar_flux(t) if cls.SOLAR_FLUX is None else cls.SOLAR_FLUX
+
+    @classmethod
+    def received_from_sun(cls, sun_vec: np.ndarray, t: np.ndarray) -> np.ndarray:
+        """Solar power on the panels for one (3,) or many (N, 3) sun vectors
+        at mission time(s) t [s]."""
+        return cls.solar_flux(t) * cls.SOLAR_PANELS.illuminated_area(sun_vec)
@@ -0,0 +1,181 @@
+"""Tiled, memory-mapped rasters of the south pole maps.
+
+A source image is converted once into a directory holding ``tiles.npy``, the
+image cut into square tiles stored as one (rows, cols, TILE, TILE, bands)
+array, and ``raster.json`` with its shape and projection. Opening it maps
+the tiles without reading them, so windows and point samples only touch the
+tiles they fall in and memory stays flat however large the mosaic:
+
+    raster = TiledRaster.convert("mercury_south_hemisphere.jpg", "map_tiles")
+    raster = TiledRaster("map_tiles")  # Later, without converting again
+    window = raster.read(400, 300, 560, 420)
+    values = raster.sample_latlon(path.lats, path.lons)
+
+The projection is the one the path images use: pole at ``centre``, equator
+at ``radius`` pixels, with x to the right and y downwards.
+"""
+
+import contextlib
+import json
+import os
+import pathlib
+
+import numpy as np
+
+from .paths import R_CIRC
+
+TILE = 256  # [px]
+# Projection of the images in paths/images
+CENTRE = (473, 355)  # [px], Pole
+RADIUS = 327  # [px], Equatorial radius
+TILES_FILE = "tiles.npy"
+META_FILE = "raster.json"
+
+
+def _strip_reader(source):
+    """Height, width and a reader of rows [y0, y1) as (rows, W, bands)."""
+    if isinstance(source, np.ndarray):
+        image = source.reshape(source.shape[:2] + (-1,))
+        return image.shape[0], image.shape[1], lambda y0, y1: image[y0:y1]
+
+    from PIL import Image
+
+    @contextlib.contextmanager
+    def no_pixel_limit():
+        # Mosaics are meant to be huge, but only lift PIL's decompression
+        # bomb check for this image, and put it back for everything else
+        limit = Image.MAX_IMAGE_PIXELS
+        Image.MAX_IMAGE_PIXELS = None
+        try:
+            yield
+        finally:
+            Image.MAX_IMAGE_PIXELS = limit
+
+    with no_pixel_limit():
+        image = Image.open(source)
+    width, height = image.size
+
+    def read_rows(y0, y1):
+        # PIL checks the size of crops too
+        with no_pixel_limit():
+            strip = np.asarray(image.crop((0, y0, width, y1)))
+        return strip.reshape(strip.shape[:2] + (-1,))
+
+    return height, width, read_rows
+
+
+class TiledRaster:
+    """Image stored as memory-mapped tiles, with pixel <-> lat/lon transforms."""
+
+    def __init__(self, directory: "str | os.PathLike"):
+        directory = pathlib.Path(directory)
+        with open(directory / META_FILE) as f:
+            meta = json.load(f)
+        self.directory = directory
+        self.height, self.width = meta["height"], meta["width"]
+        self.centre = tuple(meta["centre"])  # [px], Pole (x, y)
+        self.radius = meta["radius"]  # [px], Equatorial radius
+        self.tiles = np.load(directory / TILES_FILE, mmap_mode="r")
+        self.tile = self.tiles.shape[2]
+
+    @classmethod
+    def convert(
+        cls,
+        source: "str | os.PathLike | np.ndarray",
+        directory: "str | os.PathLike",
+        centre: tuple[float, float] = CENTRE,
+        radius: float = RADIUS,
+        tile: int = TILE,
+    ) -> "TiledRaster":
+        """Cut an image file or (H, W[, bands]) array into tiles on disk.
+
+        The source is read and written one row of tiles at a time. An array
+        source can itself be a memmap. An image file is opened lazily and
+        cropped a strip at a time, so the only full-size copy is the one PIL
+        decodes into.
+        """
+        height, width, read_rows = _strip_reader(source)
+        rows, cols = -(-height // tile), -(-width // tile)
+
+        directory = pathlib.Path(directory)
+        directory.mkdir(parents=True, exist_ok=True)
+        tiles = None
+        for r in range(rows):
+            block = read_rows(r * tile, min((r + 1) * tile, height))
+            bands = block.shape[2]
+            if tiles is None:
+                tiles = np.lib.format.open_memmap(
+                    directory / TILES_FILE,
+                    mode="w+",
+                    dtype=block.dtype,
+                    shape=(rows, cols, tile, tile, bands),
+                )
+            strip = np.zeros((tile, cols * tile, bands), block.dtype)
+            strip[: len(block), :width] = block
+            tiles[r] = strip.reshape(tile, cols, tile, bands).swapaxes(0, 1)
+        tiles.flush()
+        del tiles
+
+        meta = {
+            "height": height,
+            "width": width,
+            "centre": [float(c) for c in centre],
+            "radius": float(radius),
+        }
+        with open(directory / META_FILE, "w") as f:
+            json.dump(meta, f, indent=2)
+        return cls(directory)
+
+    @property
+    def shape(self) -> tuple[int, int, int]:
+        return self.height, self.width, self.tiles.shape[-1]
+
+    def read(self, x0: int, y0: int, x1: int, y1: int) -> np.ndarray:
+        """Pixels (y1 - y0, x1 - x0, bands) of a window, clipped to the image."""
+        x0, x1 = max(x0, 0), min(x1, self.width)
+        y0, y1 = max(y0, 0), min(y1, self.height)
+        out = np.empty(
+            (max(y1 - y0, 0), max(x1 - x0, 0), self.shape[2]), self.tiles.dtype
+        )
+        t = self.tile
+        for r in range(y0 // t, -(-y1 // t)):
+            ya, yb = max(y0, r * t), min(y1, (r + 1) * t)
+            for c in range(x0 // t, -(-x1 // t)):
+                xa, xb = max(x0, c * t), min(x1, (c + 1) * t)
+                out[ya - y0 : yb - y0, xa - x0 : xb - x0] = self.tiles[
+                    r, c, ya - r * t : yb - r * t, xa - c * t : xb - c * t
+                ]
+        return out
+
+    def sample(self, x: np.ndarray, y: np.ndarray) -> np.ndarray:
+        """Nearest pixel values (..., bands) at pixel coords x, y."""
+        x = np.clip(np.rint(x).astype(np.intp), 0, self.width - 1)
+        y = np.clip(np.rint(y).astype(np.intp), 0, self.height - 1)
+        t = self.tile
+        return self.tiles[y // t, x // t, y % t, x % t]
+
+    def pixel_to_latlon(
+        self, x: np.ndarray, y: np.ndarray
+    ) -> tuple[np.ndarray, np.ndarray]:
+        """Lat, lon [deg] of pixel coords, within the equator."""
+        scale = R_CIRC / self.radius
+        xs = (np.asarray(x) - self.centre[0]) * scale
+        ys = -(np.asarray(y) - self.centre[1]) * scale
+        # Pixels past the equator are put on it, where arccos is defined
+        lat = -np.arccos(np.minimum(np.hypot(xs, ys) / R_CIRC, 1))
+        return np.rad2deg(lat), np.rad2deg(np.arctan2(ys, xs))
+
+    def latlon_to_pixel(
+        self, lat: np.ndarray, lon: np.ndarray
+    ) -> tuple[np.ndarray, np.ndarray]:
+        """Pixel coords (x, y) of lat, lon [deg] in the southern hemisphere."""
+        r = np.cos(np.deg2rad(lat)) * self.radius
+        lon_rad = np.deg2rad(lon)
+        return (
+            self.centre[0] + r * np.cos(lon_rad),
+            self.centre[1] - r * np.sin(lon_rad),
+        )
+
+    def sample_latlon(self, lat: np.ndarray, lon: np.ndarray) -> np.ndarray:
+        """Nearest pixel values (..., bands) at lat, lon [deg]."""
+        return self.sample(*self.latlon_to_pixel(lat, lon))
@@ -0,0 +1,91 @@
+import numpy as np
+
+# Columns recorded for every simulation step
+SIM_COLUMNS = {
+    "t": np.float64,  # [s]
+    "dist": np.float64,  # [km]
+    "lat": np.float64,  # [deg]
+    "lon": np.float64,  # [deg]
+    "x": np.float32,  # [km]
+    "y": np.float32,  # [km]
+    "z": np.float32,  # [km]
+    "speed": np.float32,  # [m/s]
+    "t_excess": np.float32,  # [s]
+    "bearing": np.float32,  # [deg]
+    "term_lon": np.float64,  # [deg]
+    "phi": np.float32,  # [deg]
+    "surf_temp": np.float32,  # [degC]
+    "sun_elevation": np.float32,  # [deg]
+    "sun_azimuth": np.float32,  # [deg]
+    "power_gen": np.float32,  # [W]
+    "body_temp": np.float32,  # [degC]
+    "panel_temp": np.float32,  # [degC]
+}
+
+
+class Recorder:
+    """Columnar store of per-step state.
+
+    Each column is a preallocated array whose capacity grows geometrically, so
+    appending a step is amortised O(1) and reading a column back is a view.
+    """
+
+    GROWTH = 2
+
+    def __init__(self, columns: dict = SIM_COLUMNS, capacity: int = 4096):
+        self.columns = {name: np.dtype(dtype) for name, dtype in columns.items()}
+        self._data = {
+            name: np.empty(capacity, dtype) for name, dtype in self.columns.items()
+        }
+        self._len = 0
+
+    def __len__(self) -> int:
+        return self._len
+
+    def __contains__(self, name: str) -> bool:
+        return name in self._data
+
+    def __getitem__(self, name: str) -> np.ndarray:
+        return self._data[name][: self._len]
+
+    @property
+    def capacity(self) -> int:
+        return len(next(iter(self._data.values())))
+
+    @property
+    def nbytes(self) -> int:
+        return sum(col.nbytes for col in self._data.values())
+
+    def reserve(self, n: int):
+        """Make room for at least n steps in total."""
+        if n <= self.capacity:
+            return
+        capacity = max(n, self.GROWTH * self.capacity)
+        for name, col in self._data.items():
+            grown = np.empty(capacity, col.dtype)
+            grown[: self._len] = col[: self._len]
+            self._data[name] = grown
+
+    def append(self, **row):
+        """Record one step, with a value for every column."""
+        if row.keys() != self._data.keys():
+            raise KeyError(f"Expected columns {list(self._data)}, got {list(row)}")
+        self.reserve(self._len + 1)
+        for name, value in row.items():
+            self._data[name][self._len] = value
+        self._len += 1
+
+    def extend(self, **cols):
+        """Record a block of steps, with an array for every column."""
+        if cols.keys() != self._data.keys():
+            raise KeyError(f"Expected columns {list(self._data)}, got {list(cols)}")
+        n = len(next(iter(cols.values())))
+        self.reserve(self._len + n)
+        for name, values in cols.items():
+            self._data[name][self._len : self._len + n] = values
+        self._len += n
+
+    def trim(self):
+        """Release unused capacity."""
+        for name, col in self._data.items():
+            self._data[name] = col[: self._len].copy()
@@ -0,0 +1,73 @@
+"""Block Newton solves shared by the block-vectorized engines.
+
+``batch`` (the speed/traversal feedback) and ``LumpedThermal.integrate``
+(the implicit thermal steps) both solve a recurrence ``x[j] = f(x[j-1])``
+a block of steps at a time. Newton's method on a whole block turns each
+update into a first-order linear recurrence in the corrections, solved
+here. Blocks grow while whole blocks converge and shrink to what did.
+"""
+
+import numpy as np
+
+MIN_BLOCK = 8
+MAX_BLOCK = 1 << 16
+MAX_ITERS = 8
+# Range of prefix products that can be divided through without losing x
+MIN_PRODUCT = 1e-100
+MAX_PRODUCT = 1e100
+SCAN_TOL = 1e-16  # Size of a product of step Jacobians to stop the scan at
+
+
+def next_block(n: int, n_ok: int) -> int:
+    """Size of the next block after solving n_ok steps of a block of n."""
+    if n_ok == n:
+        return min(2 * n, MAX_BLOCK)
+    return max(min(2 * n_ok, n), MIN_BLOCK)
+
+
+def solve_linear_recurrence(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    """Solve x[0] = b[0], x[j] = a[j] * x[j-1] + b[j].
+
+    With the prefix products P[j] = a[1] ... a[j], x = P * cumsum(b / P),
+    which is quickest while P stays well scaled. When it doesn't, e.g. when
+    the steps damp each other out, falls back to a log-depth scan composing
+    the steps' affine maps, which has no divisions.
+    """
+    P = np.cumprod(np.concatenate(([1.0], a[1:])))
+    abs_P = np.abs(P)
+    if np.all((MIN_PRODUCT < abs_P) & (abs_P < MAX_PRODUCT)):
+        return P * np.cumsum(b / P)
+
+    a = np.array(a, np.float64)
+    b = np.array(b, np.float64)
+    a[0] = 0
+    s = 1
+    while s < len(b):
+        b[s:] += a[s:] * b[:-s]
+        a[s:] *= a[:-s]
+        # The products are negligible over the span covered
+        if np.max(np.abs(a)) < SCAN_TOL:
+            break
+        s *= 2
+    return b
+
+
+def solve_coupled_recurrence(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    """Solve x[0] = b[0], x[j] = a[j] x[j-1] + b[j] for 2x2 matrices a[j].
+
+    ``a`` is (2, 2, n) and ``b`` is (2, n). Always by the scan of
+    ``solve_linear_recurrence``, as matrix prefix products can't be
+    divided through.
+    """
+    a = np.array(a, np.float64)
+    b = np.array(b, np.float64)
+    a[..., 0] = 0
+    s = 1
+    while s < b.shape[1]:
+        # Compose each step's map with the one s steps before it
+        b[:, s:] += np.einsum("ijn,jn->in", a[..., s:], b[:, :-s])
+        a[..., s:] = np.einsum("ijn,jkn->ikn", a[..., s:], a[..., :-s])
+        if np.max(np.abs(a)) < SCAN_TOL:
+            break
+        s *= 2
+    return b
@@ -0,0 +1,302 @@
+"""Route graph over all the candidate traverse segments.
+
+Segments are the hand-digitised pixel polylines under "segments" in
+``data/paths.json``.
+Their endpoints are joined into junctions where they lie within
+``JOIN_TOL`` pixels of each other, and a segment is split where another one
+ends part way along it. Each segment can be driven either way, and its
+metrics in each direction are worked out once when the graph is built:
+
+- length [km]
+- terminator sweep time [s], for the terminator to move through the
+  segment's change in longitude
+- required speed [m/s], the mean speed to keep pace with the terminator
+- thermal exposure [deg], the narrowest band of Sun elevations it can be
+  driven in at up to ``SpeedControl.MAX_SPEED``, stopping when needed
+
+A route is feasible when its exposure fits in the band between the
+terminator and where the surface reaches ``SpeedControl.TEMP_MAX``. Routes
+are trails of directed segments from a start junction, and the exposure of
+a route follows from the cached metrics of its segments:
+
+    graph = RouteGraph.load()
+    routes = graph.search(start=graph.nearest_junction((288, 379)))
+    Simulation(routes[0].path()).run(engine="batch")
+"""
+
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from functools import partial
+
+import numpy as np
+
+from .paths import Path, PathsImage, PATHS_FILE, load_pixel_paths
+from .mercury import Terminator, R_AU_MIN, phi_from_surface_temp
+from .traversal import SpeedControl
+
+JOIN_TOL = 8  # [px], Max gap between segment ends at a junction
+EXPOSURE_SAMPLES = 201
+
+
+@dataclass
+class Segment:
+    """One segment of the graph, driven in one direction."""
+
+    name: str
+    start: int  # Junction index
+    end: int  # Junction index
+    path: Path
+    length: float  # [km]
+    lon_span: float  # [deg], Unwrapped change in longitude
+    sweep_time: float  # [s]
+    required_speed: float  # [m/s]
+    # Sun elevation [deg] gained at full speed relative to the start: at the
+    # end, at most and at least along the way, and its largest drop
+    lead_end: float
+    lead_max: float
+    lead_min: float
+    exposure: float
+
+    @classmethod
+    def from_path(cls, name: str, start: int, end: int, path: Path) -> "Segment":
+        length = path.total_distance()
+        dists = np.linspace(0, length, EXPOSURE_SAMPLES)
+        lons = np.unwrap(path.lons_at_dists(dists), period=360)
+        lon_span = lons[-1] - lons[0]
+        sweep_time = lon_span / Terminator.SPEED
+        required_speed = 1e3 * length / sweep_time if lon_span > 0 else np.inf
+        lead = _lead(lons - lons[0], dists)
+        return cls(
+            name,
+            start,
+            end,
+            path,
+            length,
+            lon_span,
+            sweep_time,
+            required_speed,
+            lead[-1],
+            lead.max(),
+            lead.min(),
+            np.max(np.maximum.accumulate(lead) - lead),
+        )
+
+
+def _lead(lons: np.ndarray, dists: np.ndarray) -> np.ndarray:
+    """Sun elevation [deg] gained driving flat out to each distance [km].
+
+    Driving raises the Sun elevation by the change in longitude while the
+    terminator lowers it by its own motion, and waiting only lowers it. So
+    the narrowest band of Sun elevations a stretch can be driven in is the
+    largest drop of this from a previous peak.
+    """
+    return lons - Terminator.SPEED * 1e3 * dists / SpeedControl.MAX_SPEED
+
+
+@dataclass
+class Route:
+    """Trail of directed segments through the graph."""
+
+    segments: list[Segment]
+
+    @property
+    def names(self) -> list[str]:
+        return [seg.name for seg in self.segments]
+
+    @property
+    def length(self) -> float:
+        return sum(seg.length for seg in self.segments)
+
+    @property
+    def sweep_time(self) -> float:
+        return sum(seg.sweep_time for seg in self.segments)
+
+    @property
+    def required_speed(self) -> float:
+        """Mean speed to keep pace with the terminator [m/s]."""
+        if self.sweep_time <= 0:
+            return np.inf
+        return 1e3 * self.length / self.sweep_time
+
+    @property
+    def exposure(self) -> float:
+        """Narrowest band of Sun elevations [deg] the route fits in."""
+        return _route_exposure(self.segments)
+
+    def path(self) -> Path:
+        """The whole route as one path, to simulate."""
+        lats = np.hstack([seg.path.lats[:-1] for seg in self.segments])
+        lons = np.hstack([seg.path.lons[:-1] for seg in self.segments])
+        last = self.segments[-1].path
+        lats = np.append(lats, last.lats[-1])
+        lons = np.append(lons, last.lons[-1])
+        return Path(" → ".join(self.names), lats, lons)
+
+
+# Exposure, lead at the end and peak lead of a trail with no segments yet
+NO_EXPOSURE = (0, 0, 0)
+
+
+def _drive_on(state: tuple, seg: Segment) -> tuple:
+    """Exposure, lead and peak lead of a trail after driving on along seg."""
+    exposure, lead, peak = state
+    return (
+        max(exposure, seg.exposure, peak - (lead + seg.lead_min)),
+        lead + seg.lead_end,
+        max(peak, lead + seg.lead_max),
+    )
+
+
+def _route_exposure(segments: list[Segment]) -> float:
+    """Largest drop in lead over joined segments, from their cached metrics."""
+    state = NO_EXPOSURE
+    for seg in segments:
+        state = _drive_on(state, seg)
+    return state[0]
+
+
+def _join_ends(segments: dict[str, np.ndarray], tol: float):
+    """Junction pixel coords and (name, pixels, start, end) pieces."""
+    ends = [(name, i) for name in segments for i in (0, -1)]
+    coords = np.array([segments[name][i] for name, i in ends], np.float64)
+    # Union-find of ends within tol of each other
+    parent = list(range(len(ends)))
+
+    def root(a):
+        while parent[a] != a:
+            a = parent[a]
+        return a
+
+    gaps = np.hypot(*(coords[:, np.newaxis] - coords[np.newaxis]).transpose(2, 0, 1))
+    for a, b in zip(*np.nonzero(np.triu(gaps <= tol, 1))):
+        parent[root(a)] = root(b)
+    roots = [root(a) for a in range(len(ends))]
+
+    # Ends joined to nothing else may meet another segment part way along
+    splits = {name: {0, len(pixels) - 1} for name, pixels in segments.items()}
+    at_vertex = {}
+    for a, (name, i) in enumerate(ends):
+        if roots.count(roots[a]) > 1:
+            continue
+        for other, pixels in segments.items():
+            if other == name:
+                continue
+            gaps_to = np.hypot(*(pixels - coords[a]).T)
+            j = int(np.argmin(gaps_to))
+            if gaps_to[j] <= tol and 0 < j < len(pixels) - 1:
+                splits[other].add(j)
+                at_vertex[other, j] = roots[a]
+                break
+
+    labels = {r: k for k, r in enumerate(dict.fromkeys(roots))}
+    node_of = {end: labels[r] for end, r in zip(ends, roots)}
+    members = [[] for _ in labels]
+    for a, r in enumerate(roots):
+        members[labels[r]].append(coords[a])
+
+    pieces = []
+    for name, pixels in segments.items():
+        cuts = sorted(splits[name])
+        for k, (i0, i1) in enumerate(zip(cuts[:-1], cuts[1:])):
+            nodes = []
+            for i in (i0, i1):
+                if i == 0:
+                    nodes.append(node_of[name, 0])
+                elif i == len(pixels) - 1:
+                    nodes.append(node_of[name, -1])
+                else:
+                    node = labels[at_vertex[name, i]]
+                    members[node].append(pixels[i])
+                    nodes.append(node)
+            piece_name = name if len(cuts) == 2 else f"{name}.{k + 1}"
+            pieces.append((piece_name, pixels[i0 : i1 + 1], *nodes))
+
+    junctions = np.array([np.mean(m, axis=0) for m in members])
+    return junctions, pieces
+
+
+def _extend(graph: "RouteGraph", trail: list[int], state, end, max_segments, routes):
+    """Depth-first search of feasible trails extending trail.
+
+    ``state`` is the exposure state of the trail so far, from ``_drive_on``,
+    so each extension only costs one more segment.
+    """
+    last = graph.segments[trail[-1]]
+    if end is None or last.end == end:
+        routes.append(trail)
+    if max_segments is not None and len(trail) >= max_segments:
+        return routes
+    used = {graph.segments[i].name for i in trail}
+    for i in graph.adjacency[last.end]:
+        if graph.segments[i].name in used:
+            continue
+        # Exposure only grows along a route, so this prunes whole subtrees
+        extended = _drive_on(state, graph.segments[i])
+        if extended[0] <= graph.band:
+            _extend(graph, trail + [i], extended, end, max_segments, routes)
+    return routes
+
+
+def _search_from(graph, first, end, max_segments):
+    state = _drive_on(NO_EXPOSURE, graph.segments[first])
+    return _extend(graph, [first], state, end, max_segments, [])
+
+
+class RouteGraph:
+    """Junctions joined by segments, each with cached metrics both ways."""
+
+    def __init__(self, segments: dict[str, list], join_tol: float = JOIN_TOL):
+        segments = {name: np.asarray(pixels) for name, pixels in segments.items()}
+        self.junctions, pieces = _join_ends(segments, join_tol)
+
+        # Sun elevations between the terminator and too hot, at perihelion
+        self.band = 90 - phi_from_surface_temp(SpeedControl.TEMP_MAX, R_AU_MIN)
+        self.segments = []
+        for name, pixels, start, end in pieces:
+            for a, b, px in ((start, end, pixels), (end, start, pixels[::-1])):
+                path = PathsImage.path_from_pixels(name, px)
+                self.segments.append(Segment.from_path(name, a, b, path))
+        # Outgoing feasible segments from each junction, pruning the rest
+        self.adjacency = [[] for _ in self.junctions]
+        for i, seg in enumerate(self.segments):
+            if self.feasible(seg):
+                self.adjacency[seg.start].append(i)
+
+    @classmethod
+    def load(cls, file: str = PATHS_FILE, join_tol: float = JOIN_TOL):
+        return cls(load_pixel_paths("segments", file), join_tol)
+
+    def feasible(self, seg: Segment) -> bool:
+        return seg.exposure <= self.band
+
+    def nearest_junction(self, pixel: tuple[float, float]) -> int:
+        return int(np.argmin(np.hypot(*(self.junctions - pixel).T)))
+
+    def search(
+        self,
+        start: int,
+        end: int = None,
+        max_segments: int = None,
+        processes: int = 1,
+        key=lambda route: (-route.length, route.required_speed),
+    ) -> list[Route]:
+        """Every feasible route from start (to end), best first by key.
+
+        The default ranking prefers the longest traverse, then the lowest mean
+        required speed. Routes never repeat a segment, and infeasible segments
+        are never extended, which keeps the search small. The subtrees under
+        each first segment can be searched in a process pool.
+        """
+        search = partial(_search_from, self, end=end, max_segments=max_segments)
+        firsts = self.adjacency[start]
+        if processes > 1:
+            with ProcessPoolExecutor(processes) as pool:
+                trails = list(pool.map(search, firsts))
+        else:
+            trails = [search(first) for first in firsts]
+        routes = [
+            Route([self.segments[i] for i in trail])
+            for branch in trails
+            for trail in branch
+        ]
+        return sorted(routes, key=key)
@@ -0,0 +1,128 @@
+"""Offline speed-profile optimization over the whole path.
+
+Distance along the path and mission time are discretised into a grid, with
+time-steps of ``dt`` and distance cells sized so that ``speed_levels`` cells
+per step is ``SpeedControl.MAX_SPEED``. Every cell has a temperature margin:
+the max surface temp allowed there by ``SpeedControl`` minus the surface temp
+at that time. Dynamic programming forward in time finds the best worst-case
+margin of any way of reaching each cell, and the schedule is traced back from
+the end of the path. Either the earliest arrival with a non-negative margin
+("time") or the largest margin by any arrival ("margin") is picked.
+
+The result replays through the simulation as a feed-forward speed source:
+
+    schedule = optimize(path, objective="time")
+    rec = Simulation(path, schedule=schedule).run()
+"""
+
+from dataclasses import dataclass
+
+import numpy as np
+
+from .utils import snap_angle_range, SECS_PER_DAY
+from .paths import Path
+from .mercury import Terminator, SurfaceThermal, surface_temp
+from .traversal import SpeedControl
+
+DT = 60 * 60  # [s]
+SPEED_LEVELS = 4
+MAX_DAYS = 300  # [day], Horizon of the search
+
+
+@dataclass
+class SpeedSchedule:
+    """Planned distance [km] along the path at mission times t [s]."""
+
+    t: np.ndarray
+    dist: np.ndarray
+    min_margin: float  # [degC], Worst temperature margin along the way
+
+    @property
+    def speeds(self) -> np.ndarray:
+        """Speed [m/s] over each interval between planned times."""
+        return np.diff(self.dist) * 1e3 / np.diff(self.t)
+
+    def dist_at(self, t: np.ndarray) -> np.ndarray:
+        """Planned distance [km] at mission time(s) t [s]."""
+        return np.interp(t, self.t, self.dist)
+
+    def tracking_speed(self, dist: float, t: float, dt: float) -> float:
+        """Speed [m/s] that reaches the planned distance at t from dist in dt."""
+        speed = (self.dist_at(t) - dist) / (1e-3 * dt)
+        return min(max(speed, 0), SpeedControl.MAX_SPEED)
+
+
+def _margins(path, lons, temps_max, t):
+    """Allowed minus actual surface temp [degC] at path longitudes at time t [s]."""
+    phis = snap_angle_range(90 - (lons - Terminator.longitude_at(path, t)))
+    return temps_max - surface_temp(phis, SurfaceThermal.sun_distance(t))
+
+
+def optimize(
+    path: Path,
+    objective: str = "time",
+    dt: float = DT,
+    speed_levels: int = SPEED_LEVELS,
+    max_days: float = MAX_DAYS,
+) -> SpeedSchedule:
+    """Speed schedule over the whole path for the given objective.
+
+    "time" minimises mission time while keeping to the temperature limits,
+    "margin" maximises the worst temperature margin, arriving as early as
+    that allows. Speeds are multiples of ``MAX_SPEED / speed_levels``.
+    """
+    if objective not in ("time", "margin"):
+        raise ValueError(f"Unknown objective: {objective}")
+    total = path.total_distance()
+    cell = SpeedControl.MAX_SPEED * 1e-3 * dt / speed_levels  # [km]
+    # The last cell is strictly past the end, so replays always finish
+    n_cells = int(total // cell) + 2
+    dists = np.arange(n_cells) * cell
+    n_steps = int(max_days * SECS_PER_DAY // dt) + 1
+    lons = path.lons_at_dists(dists)
+    temps_max = SpeedControl.target_temps_max(dists)
+
+    value = np.full(n_cells, -np.inf)
+    value[0] = _margins(path, lons[0], temps_max[0], 0.0)
+    shifts = [np.zeros(1, np.uint8)]
+    end_values = [value[-1]]
+    cands = np.empty((speed_levels + 1, n_cells))
+    for k in range(1, n_steps):
+        # Only cells within reach of the start so far can be occupied
+        hi = min(k * speed_levels + 1, n_cells)
+        cands[:, :hi] = -np.inf
+        for s in range(speed_levels + 1):
+            cands[s, s:hi] = value[: hi - s]
+        shift = np.argmax(cands[:, :hi], axis=0)
+        best = np.take_along_axis(cands[:, :hi], shift[np.newaxis], 0)[0]
+        margins = _margins(path, lons[:hi], temps_max[:hi], k * dt)
+        value[:hi] = np.minimum(best, margins)
+        shifts.append(shift.astype(np.uint8))
+        end_values.append(value[-1])
+        if objective == "time" and value[-1] >= 0:
+            break
+
+    end_values = np.array(end_values)
+    if objective == "time":
+        arrived = np.flatnonzero(end_values >= 0)
+        if not arrived.size:
+            raise ValueError(
+                f"No schedule keeps to the temperature limits within {max_days} "
+                f"days, best margin {np.max(end_values):.1f} degC"
+            )
+        k_end = arrived[0]
+    else:
+        if np.all(np.isinf(end_values)):
+            raise ValueError(f"Path can't be traversed within {max_days} days")
+        k_end = np.argmax(end_values)
+
+    # Trace the best way back from the end cell
+    cells = np.empty(k_end + 1, np.intp)
+    cells[k_end] = n_cells - 1
+    for k in range(k_end, 0, -1):
+        cells[k - 1] = cells[k] - shifts[k][cells[k]]
+    return SpeedSchedule(
+        t=np.arange(k_end + 1) * dt,
+        dist=dists[cells],
+        min_margin=float(end_values[k_end]),
+    )
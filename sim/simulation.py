@@ -0,0 +1,167 @@
+from types import SimpleNamespace
+
+import numpy as np
+
+from .paths import Path, PathsImage
+from .mercury import Terminator, Sun, SurfaceThermal
+from .traversal import Traversal, SpeedControl
+from .power import Power
+from .thermal import LumpedThermal
+from .recorder import Recorder
+from .instrument import StepProfiler
+from .scheduler import Scheduler
+from . import batch
+from .utils import SECS_PER_DAY
+
+DT = 60 * 10  # [s]
+
+
+class Simulation:
+    """One traverse of a path, stepping the models and recording their state.
+
+    Nothing here imports matplotlib or tqdm, so it's cheap to create and run
+    many of these from worker processes.
+    """
+
+    PBAR_FORMAT = (
+        "{l_bar}{bar}| {n:.3f}/{total:.0f} "
+        "[{elapsed}<{remaining}, {rate_fmt}{postfix}]"
+    )
+
+    def __init__(self, path: Path = None, dt: float = DT, schedule=None, rec=None):
+        self.path = PathsImage.get_global_path() if path is None else path
+        self.dt = dt
+        # Planned SpeedSchedule to follow instead of reacting to surface temp
+        self.schedule = schedule
+        self.t = 0  # [s]
+        # Recorder, or e.g. a TrajectoryWriter to stream the steps to disk
+        self.rec = Recorder() if rec is None else rec
+        self.profiler = None
+
+        self.models = SimpleNamespace()
+        self.models.term = Terminator(self)
+        self.models.traverse = Traversal(self)
+        self.models.speed = SpeedControl(self)
+        self.models.surf_temp = SurfaceThermal(self)
+        self.models.sun = Sun(self)
+        self.models.power = Power(self)
+        self.models.thermal = LumpedThermal(self)
+        self.scheduler = Scheduler(self)
+
+    def done(self) -> bool:
+        """Whether the entire path has been traversed."""
+        return self.models.traverse.dist >= self.path.total_distance()
+
+    def record(self):
+        """Record state values at the current time t_i."""
+        pos = self.models.traverse.pos
+        self.rec.append(
+            t=self.t,
+            dist=self.models.traverse.dist,
+            lat=pos.lat,
+            lon=pos.lon,
+            x=pos.xyz[0],
+            y=pos.xyz[1],
+            z=pos.xyz[2],
+            speed=self.models.speed.speed,
+            t_excess=self.models.speed.t_excess,
+            bearing=self.models.traverse.bearing,
+            term_lon=self.models.term.longitude,
+            phi=self.models.traverse.phi,
+            surf_temp=self.models.surf_temp.surface_temp,
+            sun_elevation=self.models.sun.elevation,
+            sun_azimuth=self.models.sun.azimuth,
+            power_gen=self.models.power.generated,
+            body_temp=self.models.thermal.body_temp,
+            panel_temp=self.models.thermal.panel_temp,
+        )
+
+    def step(self):
+        """Propogate to next time-step at t_{i+1}."""
+        self.t += self.dt
+        self.scheduler.step(self.dt)
+
+    def run(
+        self,
+        engine: str = "loop",
+        progress: bool = False,
+        profile: bool = False,
+        allocations: bool = False,
+        until: float = None,
+        thermal: bool = False,
+    ) -> Recorder:
+        """Simulate until the whole path is traversed and return the recording.
+
+        ``engine`` is either "loop", stepping each model in turn, or "batch",
+        the block-vectorized engine in ``batch.py``. With ``profile`` the loop
+        engine times each model's step, and with ``allocations`` keeps the
+        peak memory each allocates too. ``self.profiler`` has the results.
+
+        The loop engine can stop early once it's ``until`` [km] along the
+        path, and calling ``run`` again, or on a restored checkpoint, carries
+        on from there. The batch engine can only start from the beginning.
+        The loop engine always steps ``LumpedThermal``, but the batch engine
+        only integrates the body and panel temps with ``thermal``.
+        """
+        if engine == "batch":
+            if profile or allocations or until is not None:
+                raise ValueError("Profiling and stopping early need the loop engine")
+            if self.t:
+                raise ValueError("The batch engine can only start from the beginning")
+            if type(self.rec) is Recorder:
+                self.rec = batch.simulate(self.path, self.dt, self.schedule, thermal)
+            else:
+                batch.simulate(self.path, self.dt, self.schedule, thermal, self.rec)
+                self.rec.trim()
+            return self.rec
+        if engine != "loop":
+            raise ValueError(f"Unknown engine: {engine}")
+        # Already finished, with the final state recorded
+        if self.done() and len(self.rec) and self.rec["t"][-1] == self.t:
+            return self.rec
+        profiler = None
+        if profile or allocations:
+            profiler = self.profiler = StepProfiler.attach(self, allocations)
+
+        pbar = None
+        try:
+            if progress:
+                from tqdm import tqdm
+
+                pbar = tqdm(
+                    total=self.path.total_distance(),
+                    unit="km",
+                    bar_format=self.PBAR_FORMAT,
+                )
+            prev_dist = self.models.traverse.dist
+            while True:
+                self.record()
+                if self.done():
+                    break
+                if pbar is not None:
+                    pbar.update(self.models.traverse.dist - prev_dist)
+                    prev_dist = self.models.traverse.dist
+                self.step()
+                # Stop before recording, which is where running again starts
+                if until is not None and self.models.traverse.dist >= until:
+                    break
+        finally:
+            # Unwrap even when a step raises, so the sim can still be used
+            if pbar is not None:
+                pbar.close()
+            if profiler is not None:
+                profiler.detach(self)
+
+        self.rec.trim()
+        return self.rec
+
+
+def summarize(rec: Recorder) -> dict[str, float]:
+    """Summary metrics of a recorded traverse."""
+    return {
+        "duration_days": float(rec["t"][-1] / SECS_PER_DAY),
+        "max_surf_temp": float(np.max(rec["surf_temp"])),
+        "stoppage_hours": float(np.sum(rec["t_excess"], dtype=np.float64) / 3600),
+        "min_power_gen": float(np.min(rec["power_gen"])),
+        "mean_power_gen": float(np.mean(rec["power_gen"], dtype=np.float64)),
+    }
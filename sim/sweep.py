@@ -0,0 +1,141 @@
+"""Parallel parameter sweeps over model constants.
+
+Parameters are named ``"<Model>.<CONSTANT>"``, e.g. ``"SpeedControl.MAX_SPEED"``
+or ``"Orbit.MEAN_ANOMALY_0"``, plus ``"dt"`` for the time-step. Each scenario
+temporarily overrides the class constants in a worker process, simulates the
+whole traverse and is reduced to the metrics from ``summarize``.
+
+    rows = sweep({"SpeedControl.MAX_SPEED": [1.2, 1.6], "dt": [600, 300]})
+"""
+
+import csv
+import os
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
+from functools import partial
+from itertools import product
+
+from .paths import Path, PathsImage
+from .mercury import Terminator, Orbit, SurfaceThermal
+from .traversal import SpeedControl
+from .power import Power
+from .thermal import LumpedThermal
+from .simulation import DT, Simulation, summarize
+from . import checkpoint
+
+MODELS = {
+    cls.__name__: cls
+    for cls in (Terminator, Orbit, SurfaceThermal, SpeedControl, Power, LumpedThermal)
+}
+
+# Path, and any snapshot to fork from, shared by all scenarios in a worker
+# process, set once at start-up
+_path = None
+_start = None
+
+
+def _resolve(name: str) -> tuple[type, str]:
+    model, _, attr = name.partition(".")
+    if model not in MODELS or not hasattr(MODELS[model], attr):
+        raise KeyError(f"Unknown parameter: {name}")
+    return MODELS[model], attr
+
+
+def expand_grid(grid: dict[str, list]) -> list[dict]:
+    """Every combination of the parameter values in grid."""
+    return [dict(zip(grid, values)) for values in product(*grid.values())]
+
+
+@contextmanager
+def overridden(params: dict):
+    """Temporarily set model class constants named in params."""
+    saved = []
+    try:
+        for name, value in params.items():
+            if name == "dt":
+                continue
+            cls, attr = _resolve(name)
+            saved.append((cls, attr, getattr(cls, attr)))
+            setattr(cls, attr, value)
+        yield
+    finally:
+        for cls, attr, value in reversed(saved):
+            setattr(cls, attr, value)
+
+
+def _init_worker(path: Path, start: Simulation = None):
+    global _path, _start
+    _path, _start = path, start
+
+
+def run_scenario(
+    params: dict,
+    path: Path = None,
+    engine: str = "batch",
+    profile: bool = False,
+    start: Simulation = None,
+) -> dict:
+    """Simulate one scenario and return its parameters and summary metrics.
+
+    With ``start`` the scenario carries on from a fork of that part-way
+    simulation instead of the start of the path. With ``profile`` the
+    per-model step profile is added to the metrics.
+    """
+    path = _path if path is None else path
+    start = _start if start is None else start
+    with overridden(params):
+        if start is None:
+            sim = Simulation(path, dt=params.get("dt", DT))
+        else:
+            sim = checkpoint.fork(start)
+            sim.dt = params.get("dt", sim.dt)
+        rec = sim.run(engine=engine, profile=profile)
+        row = {**params, **summarize(rec)}
+        if profile:
+            row.update(sim.profiler.flat())
+        return row
+
+
+def sweep(
+    grid: dict[str, list],
+    path: Path = None,
+    processes: int = None,
+    engine: str = "batch",
+    profile: bool = False,
+    start: Simulation = None,
+) -> list[dict]:
+    """Run every scenario in the grid across a process pool.
+
+    Returns one row per scenario, in grid order, with the parameter values and
+    summary metrics. The path is only sent to each worker once. Scenarios
+    that only differ late in the mission can all fork from a ``start``
+    simulation run part way with the loop engine, e.g. loaded from a
+    checkpoint, to skip simulating the shared part again.
+    """
+    for name in grid:
+        if name != "dt":
+            _resolve(name)
+    if start is not None:
+        if engine != "loop":
+            raise ValueError("Forking from a simulation needs the loop engine")
+        path = start.path
+    scenarios = expand_grid(grid)
+    path = PathsImage.get_global_path() if path is None else path
+    processes = min(processes or os.cpu_count(), len(scenarios))
+    if processes <= 1:
+        return [
+            run_scenario(params, path, engine, profile, start) for params in scenarios
+        ]
+
+    with ProcessPoolExecutor(
+        processes, initializer=_init_worker, initargs=(path, start)
+    ) as pool:
+        run = partial(run_scenario, engine=engine, profile=profile)
+        return list(pool.map(run, scenarios))
+
+
+def write_csv(rows: list[dict], file: str):
+    with open(file, "w", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=list(rows[0]))
+        writer.writeheader()
+        writer.writerows(rows)
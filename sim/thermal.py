@@ -1,23 +1,41 @@
+from types import SimpleNamespace
+
 import numpy as np
 
-from utils import Model, Plane
+from .utils import Model, Plane, PlaneSet, degC_to_K, K_to_degC
+from .mercury import Orbit
+from .recurrence import (
+    MIN_BLOCK,
+    MAX_ITERS,
+    next_block,
+    solve_linear_recurrence,
+    solve_coupled_recurrence,
+)
+
+# [W / m^2], At perihelion, the worst case of the steady-state analyses
+PERIHELION_SOLAR_FLUX = 14462
 
 
 class Thermal(Model):
-    SOLAR_FLUX = 14462  # [W / m^2], Maximum at perihelion
+    INPUTS = ("sun.vec",)
+    OUTPUTS = ("power_sun",)
+
+    SOLAR_FLUX = PERIHELION_SOLAR_FLUX  # [W / m^2]
 
     X_DIM = 0.3
     Y_DIM = 0.2
     Z_DIM = 0.2
 
-    PANELS = [
-        Plane(Y_DIM * Z_DIM, [1, 0, 0]),    # X faces
-        Plane(Y_DIM * Z_DIM, [-1, 0, 0]),
-        Plane(X_DIM * Z_DIM, [0, 1, 0]),    # Y faces
-        Plane(X_DIM * Z_DIM, [0, -1, 0]),
-        Plane(X_DIM * Y_DIM, [0, 0, 1]),    # Z faces
-        Plane(X_DIM * Y_DIM, [0, 0, -1]),
-    ]
+    PANELS = PlaneSet.from_planes(
+        [
+            Plane(Y_DIM * Z_DIM, [1, 0, 0]),  # X faces
+            Plane(Y_DIM * Z_DIM, [-1, 0, 0]),
+            Plane(X_DIM * Z_DIM, [0, 1, 0]),  # Y faces
+            Plane(X_DIM * Z_DIM, [0, -1, 0]),
+            Plane(X_DIM * Y_DIM, [0, 0, 1]),  # Z faces
+            Plane(X_DIM * Y_DIM, [0, 0, -1]),
+        ]
+    )
 
     def __init__(self, sim):
         super().__init__(sim)
@@ -25,8 +43,320 @@ class Thermal(Model):
 
     def step(self, dt: float):
         # Estimate heat from solar radiation
-        sun_vec = self.sim.models.sun.vec
-        tot_area = 0
-        for plane in self.PANELS:
-            tot_area += plane.projected_area(sun_vec)
-        self.power_sun = self.SOLAR_FLUX * tot_area
+        self.power_sun = self.sun_power(self.sim.models.sun.vec)
+
+    @classmethod
+    def sun_power(cls, sun_vec: np.ndarray) -> np.ndarray:
+        """Solar heat on the body for one (3,) or many (T, 3) sun vectors."""
+        return cls.SOLAR_FLUX * cls.PANELS.illuminated_area(sun_vec)
+
+
+STEF_BOLTZ = 5.6703e-8  # [W/(m^2 K^4)]
+T_SKY = 3  # [K]
+
+# Unit area of the sun-facing body front and solar panels
+FRONT = PlaneSet([1], [[1, 0, 0]])
+
+# View Factors
+F_GROUND_TO_BOTTOM = 1
+F_GROUND_TO_VERT = 0.5
+F_SKY_TO_TOP = 1
+F_SKY_TO_VERT = 0.5
+
+# Block solver of LumpedThermal.integrate, see recurrence.py
+TEMP_TOL = 1e-10  # [K], Max residual for a step to count as solved
+FD_TEMP = 1e-3  # [K], Finite-difference step for the step's Jacobian
+
+
+class LumpedThermal(Model):
+    """Transient two-node (body and solar panels) thermal model of META.
+
+    The same energy balance as ``steady_state_thermal.ipynb``: absorbed sunlight,
+    radiation to the ground and sky and conduction across the body-panel
+    interface, plus heat capacities so the node temps lag their surroundings.
+    Integrated with linearly implicit Euler, which is stable for any time-step.
+    """
+
+    INPUTS = ("sun.vec", "surf_temp.surface_temp", "t", "dt")
+    OUTPUTS = ("body_temp", "panel_temp")
+
+    SOLAR_FLUX = None  # [W / m^2], Fixed flux, or None to follow Mercury's orbit
+    INITIAL_TEMP = 20  # [degC]
+
+    # Material Properties
+    # fmt: off
+    # Body
+    ABSORPTIVITY_BODY_FRONT     = 0.15      # Conservative value for white paint on chassis front
+    EMISSIVITY_BODY_FRONT       = 0.88      # Estimate for chassis front
+    EMISSIVITY_BODY_BOTTOM      = 0.8       # Radiator on bottom
+    EMISSIVITY_BODY_TOP         = 0.8       # Radiator on top
+    EMISSIVITY_BODY_BACKSIDE    = 0.8       # Radiator on sides and back
+    # Panels
+    ABSORPTIVITY_PANEL_FRONT    = 0.75      # IME - CONDUCTIVE COATING
+    EMISSIVITY_PANEL_FRONT      = 0.79      # IME - CONDUCTIVE COATING
+    EMISSIVITY_PANEL_BACK       = 0.985     # Radiator on back of solar panels
+    EFFICIENCY_PANEL            = 0.20      # Estimate of how much absorbed energy is used for power
+    # Heat capacities, estimates for aluminium structure
+    HEAT_CAPACITY_BODY          = 5.0 * 900  # [J/K]
+    HEAT_CAPACITY_PANEL         = 0.5 * 900  # [J/K]
+    # fmt: on
+
+    # Body Dimensions [m]
+    X_DIM = 0.3
+    Y_DIM = 0.2
+    Z_DIM = 0.2
+
+    # Body Areas [m^2]
+    A_BODY_FRONT = Y_DIM * Z_DIM
+    A_BODY_BOTTOM = X_DIM * Y_DIM
+    A_BODY_TOP = A_BODY_BOTTOM
+    A_BODY_BACKSIDE = 2 * (X_DIM * Z_DIM) + (Y_DIM * Z_DIM)
+
+    # Panel Area [m^2]
+    A_PANEL = 2 * (0.2 * 0.3)
+
+    # Thermal Conduction Interface
+    K_INTERFACE = 0  # [W/(m K)]
+    A_INTERFACE = 2 * Z_DIM * 0.005  # [m^2]
+    L_INTERFACE = 0.01  # [m]
+
+    Q_GEN_BODY = 0  # [W], Internally generated power
+
+    def __init__(self, sim):
+        super().__init__(sim)
+        self.body_temp = self.INITIAL_TEMP
+        self.panel_temp = self.INITIAL_TEMP
+        self._coefs = self.coefficients()
+
+    def step(self, dt: float):
+        c = self._coefs
+        q_in_body, q_in_panel = self._heat_inputs(
+            c,
+            self.sim.models.sun.vec,
+            degC_to_K(self.sim.models.surf_temp.surface_temp),
+            self.solar_flux(self.sim.t),
+        )
+        T_body, T_panel = self._implicit_step(
+            c,
+            degC_to_K(self.body_temp),
+            degC_to_K(self.panel_temp),
+            q_in_body,
+            q_in_panel,
+            dt,
+        )
+        self.body_temp, self.panel_temp = K_to_degC(T_body), K_to_degC(T_panel)
+
+    @classmethod
+    def solar_flux(cls, t: np.ndarray) -> np.ndarray:
+        """Solar flux [W/m^2] used at mission time(s) t [s]."""
+        return Orbit.solar_flux(t) if cls.SOLAR_FLUX is None else cls.SOLAR_FLUX
+
+    @classmethod
+    def coefficients(cls, **overrides) -> SimpleNamespace:
+        """Lumped radiative and conductive coefficients of the two nodes.
+
+        Any class constant can be overridden, including with arrays to
+        evaluate many designs at once.
+        """
+        p = SimpleNamespace(
+            **{
+                name: overrides.pop(name, getattr(cls, name))
+                for name in dir(cls)
+                if name.isupper()
+            }
+        )
+        if overrides:
+            raise KeyError(f"Unknown constants: {list(overrides)}")
+        # fmt: off
+        ground_body = STEF_BOLTZ * (
+            p.A_BODY_BOTTOM   * F_GROUND_TO_BOTTOM  * p.EMISSIVITY_BODY_BOTTOM    +
+            p.A_BODY_BACKSIDE * F_GROUND_TO_VERT    * p.EMISSIVITY_BODY_BACKSIDE  +
+            p.A_BODY_FRONT    * F_GROUND_TO_VERT    * p.EMISSIVITY_BODY_FRONT
+        )
+        sky_body = STEF_BOLTZ * (
+            p.A_BODY_TOP      * F_SKY_TO_TOP    * p.EMISSIVITY_BODY_TOP       +
+            p.A_BODY_BACKSIDE * F_SKY_TO_VERT   * p.EMISSIVITY_BODY_BACKSIDE  +
+            p.A_BODY_FRONT    * F_SKY_TO_VERT   * p.EMISSIVITY_BODY_FRONT
+        )
+        ground_panel = STEF_BOLTZ * p.A_PANEL * F_GROUND_TO_VERT * (
+            p.EMISSIVITY_PANEL_FRONT + p.EMISSIVITY_PANEL_BACK
+        )
+        sky_panel = STEF_BOLTZ * p.A_PANEL * F_SKY_TO_VERT * (
+            p.EMISSIVITY_PANEL_FRONT + p.EMISSIVITY_PANEL_BACK
+        )
+        # fmt: on
+        return SimpleNamespace(
+            ground_body=ground_body,
+            sky_body=sky_body,
+            ground_panel=ground_panel,
+            sky_panel=sky_panel,
+            # Absorbing areas of the front faces [m^2]
+            sun_body=p.ABSORPTIVITY_BODY_FRONT * p.A_BODY_FRONT,
+            sun_panel=p.ABSORPTIVITY_PANEL_FRONT * (1 - p.EFFICIENCY_PANEL) * p.A_PANEL,
+            kappa=p.K_INTERFACE * p.A_INTERFACE / p.L_INTERFACE,  # [W/K]
+            q_gen_body=p.Q_GEN_BODY,
+            cap_body=p.HEAT_CAPACITY_BODY,
+            cap_panel=p.HEAT_CAPACITY_PANEL,
+        )
+
+    @staticmethod
+    def _heat_inputs(c, sun_vec, T_ground, solar_flux):
+        """Temperature independent heat flowing into each node [W]."""
+        env = T_ground**4
+        flux = solar_flux * FRONT.illuminated_area(sun_vec)
+        q_in_body = (
+            c.sun_body * flux
+            + c.ground_body * env
+            + c.sky_body * T_SKY**4
+            + c.q_gen_body
+        )
+        q_in_panel = c.sun_panel * flux + c.ground_panel * env + c.sky_panel * T_SKY**4
+        return q_in_body, q_in_panel
+
+    @staticmethod
+    def _implicit_step(c, T_body, T_panel, q_in_body, q_in_panel, dt):
+        """One linearly implicit Euler step of both node temps [K].
+
+        Solves ``(C / dt - J) dT = Q(T)`` with the Jacobian J of the net heat
+        Q, by Cramer's rule so it works on floats and arrays alike. Only uses
+        arithmetic, so scalars stay Python floats for speed.
+        """
+        rad_body = (c.ground_body + c.sky_body) * T_body**4
+        rad_panel = (c.ground_panel + c.sky_panel) * T_panel**4
+        q_cond = c.kappa * (T_panel - T_body)
+        Q_body = q_in_body - rad_body + q_cond
+        Q_panel = q_in_panel - rad_panel - q_cond
+        m_body = c.cap_body / dt + 4 * rad_body / T_body + c.kappa
+        m_panel = c.cap_panel / dt + 4 * rad_panel / T_panel + c.kappa
+        det = m_body * m_panel - c.kappa**2
+        return (
+            T_body + (m_panel * Q_body + c.kappa * Q_panel) / det,
+            T_panel + (m_body * Q_panel + c.kappa * Q_body) / det,
+        )
+
+    @classmethod
+    def _solve_block(cls, c, T_body0, T_panel0, q_in_body, q_in_panel, dt):
+        """Integrate from temps [K] over a block of heat inputs.
+
+        Newton's method on the whole block turns the implicit steps into a
+        linear recurrence, as in ``batch._solve_block``, and a step is
+        accepted once its residual is below ``TEMP_TOL``. Returns the number
+        of accepted steps and the body and panel temps after each of them.
+        """
+        n = len(q_in_body)
+        args = (q_in_body, q_in_panel, dt)
+        # Steps past where a poor guess blows up just aren't accepted
+        with np.errstate(divide="ignore", over="ignore", invalid="ignore"):
+            # Start from where each node would settle with each step's inputs
+            # held, which they follow closely at small dt
+            T_body = (q_in_body / (c.ground_body + c.sky_body)) ** 0.25
+            T_panel = (q_in_panel / (c.ground_panel + c.sky_panel)) ** 0.25
+            T_body = np.where(np.isfinite(T_body), T_body, T_body0)
+            T_panel = np.where(np.isfinite(T_panel), T_panel, T_panel0)
+            for _ in range(MAX_ITERS):
+                prev_body = np.concatenate(([T_body0], T_body[:-1]))
+                prev_panel = np.concatenate(([T_panel0], T_panel[:-1]))
+                next_body, next_panel = cls._implicit_step(
+                    c, prev_body, prev_panel, *args
+                )
+                resid_body, resid_panel = next_body - T_body, next_panel - T_panel
+                bad = np.flatnonzero(
+                    ~(
+                        (np.abs(resid_body) <= TEMP_TOL)
+                        & (np.abs(resid_panel) <= TEMP_TOL)
+                    )
+                )
+                n_ok = bad[0] if bad.size else n
+                if n_ok == n:
+                    break
+                if np.all(c.kappa == 0):
+                    # Without conduction the nodes don't affect each other
+                    body_body, panel_panel = cls._implicit_step(
+                        c, prev_body + FD_TEMP, prev_panel + FD_TEMP, *args
+                    )
+                    d_body = solve_linear_recurrence(
+                        (body_body - next_body) / FD_TEMP, resid_body
+                    )
+                    d_panel = solve_linear_recurrence(
+                        (panel_panel - next_panel) / FD_TEMP, resid_panel
+                    )
+                else:
+                    body_body, panel_body = cls._implicit_step(
+                        c, prev_body + FD_TEMP, prev_panel, *args
+                    )
+                    body_panel, panel_panel = cls._implicit_step(
+                        c, prev_body, prev_panel + FD_TEMP, *args
+                    )
+                    jacobian = [
+                        [body_body - next_body, body_panel - next_body],
+                        [panel_body - next_panel, panel_panel - next_panel],
+                    ]
+                    d_body, d_panel = solve_coupled_recurrence(
+                        np.divide(jacobian, FD_TEMP), (resid_body, resid_panel)
+                    )
+                T_body += d_body
+                T_panel += d_panel
+
+        # The first step only depends on the known temps so is always solved
+        n_ok = max(n_ok, 1)
+        return n_ok, next_body[:n_ok], next_panel[:n_ok]
+
+    @classmethod
+    def integrate(
+        cls,
+        sun_vecs: np.ndarray,
+        ground_temps: np.ndarray,
+        dt: float,
+        t: np.ndarray = None,
+        initial: tuple[float, float] = None,
+        **overrides,
+    ) -> tuple[np.ndarray, np.ndarray]:
+        """Body and panel temps [degC] over recorded sun vectors and ground temps.
+
+        Post-processing counterpart to stepping the model, at mission times t
+        [s], every dt from 0 unless given. Step 0 is at INITIAL_TEMP and step i
+        uses the inputs at step i, as in the simulation loop. With ``initial``,
+        the body and panel temps [degC] of the step before, step 0 is stepped
+        from those instead, to carry on from an earlier call. The heat inputs
+        are computed as arrays up front and the implicit steps are solved a
+        block at a time, each to within ``TEMP_TOL`` of the loop's step.
+        """
+        c = cls.coefficients(**overrides)
+        n = len(ground_temps)
+        t = np.arange(n) * dt if t is None else t
+        solar_flux = overrides.get("SOLAR_FLUX", cls.SOLAR_FLUX)
+        q_in_body, q_in_panel = cls._heat_inputs(
+            c,
+            sun_vecs,
+            degC_to_K(np.asarray(ground_temps, np.float64)),
+            Orbit.solar_flux(t) if solar_flux is None else solar_flux,
+        )
+        if initial is not None:
+            # Solve from a step before the first, with unused heat inputs
+            q_in_body = np.concatenate(([np.nan], q_in_body))
+            q_in_panel = np.concatenate(([np.nan], q_in_panel))
+            n += 1
+        T_body = np.empty(n)
+        T_panel = np.empty(n)
+        if initial is None:
+            T_body[0] = T_panel[0] = degC_to_K(
+                overrides.get("INITIAL_TEMP", cls.INITIAL_TEMP)
+            )
+        else:
+            T_body[0], T_panel[0] = degC_to_K(np.asarray(initial, np.float64))
+        i, size = 1, MIN_BLOCK
+        while i < n:
+            n_ok, body, panel = cls._solve_block(
+                c,
+                T_body[i - 1],
+                T_panel[i - 1],
+                q_in_body[i : i + size],
+                q_in_panel[i : i + size],
+                dt,
+            )
+            T_body[i : i + n_ok], T_panel[i : i + n_ok] = body, panel
+            i += n_ok
+            size = next_block(size, n_ok)
+        if initial is not None:
+            T_body, T_panel = T_body[1:], T_panel[1:]
+        return K_to_degC(T_body), K_to_degC(T_panel)
@@ -0,0 +1,150 @@
+"""Streaming on-disk storage of recorded steps, for long or fine-dt runs.
+
+``TrajectoryWriter`` stands in for the ``Recorder`` of a simulation, but only
+buffers ``chunk`` steps in memory. Each full chunk is appended to one raw
+binary file per column, so memory use doesn't grow with the length of the
+run. ``trajectory.json`` holds the column dtypes and number of steps, and is
+updated with every flush, so a run that dies leaves everything up to its last
+flush readable. ``Trajectory`` memory-maps the columns back:
+
+    sim = Simulation(dt=1, rec=TrajectoryWriter("run_dt1"))
+    sim.run()
+    traj = Trajectory("run_dt1")
+    traj["surf_temp"].max()
+"""
+
+import json
+import os
+import pathlib
+
+import numpy as np
+
+from .recorder import SIM_COLUMNS
+
+CHUNK = 1 << 16  # [steps], Buffered in memory between flushes
+META_FILE = "trajectory.json"
+
+
+def _column_file(directory: pathlib.Path, name: str) -> pathlib.Path:
+    return directory / f"{name}.bin"
+
+
+def _write_meta(directory: pathlib.Path, columns: dict, length: int):
+    meta = {
+        "length": length,
+        "columns": {name: dtype.str for name, dtype in columns.items()},
+    }
+    # Write then rename so readers never see a partial file
+    tmp_file = directory / f"{META_FILE}.tmp"
+    with open(tmp_file, "w") as f:
+        json.dump(meta, f, indent=2)
+    os.replace(tmp_file, directory / META_FILE)
+
+
+class TrajectoryWriter:
+    """Recorder that streams fixed-size chunks of steps to disk."""
+
+    def __init__(
+        self,
+        directory: "str | os.PathLike",
+        columns: dict = SIM_COLUMNS,
+        chunk: int = CHUNK,
+    ):
+        self.directory = pathlib.Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.columns = {name: np.dtype(dtype) for name, dtype in columns.items()}
+        self.chunk = chunk
+        self._buffer = {
+            name: np.empty(chunk, dtype) for name, dtype in self.columns.items()
+        }
+        self._buffered = 0
+        self._flushed = 0
+        # Start each column file empty
+        for name in self.columns:
+            _column_file(self.directory, name).write_bytes(b"")
+        _write_meta(self.directory, self.columns, 0)
+
+    def __len__(self) -> int:
+        return self._flushed + self._buffered
+
+    def __contains__(self, name: str) -> bool:
+        return name in self.columns
+
+    def __getitem__(self, name: str) -> np.ndarray:
+        """Whole column so far, memory-mapped from disk."""
+        self.flush()
+        return Trajectory(self.directory)[name]
+
+    @property
+    def nbytes(self) -> int:
+        """Bytes held in memory."""
+        return sum(col.nbytes for col in self._buffer.values())
+
+    def flush(self):
+        """Append the buffered steps to the column files."""
+        if not self._buffered:
+            return
+        for name, col in self._buffer.items():
+            with open(_column_file(self.directory, name), "ab") as f:
+                col[: self._buffered].tofile(f)
+        self._flushed += self._buffered
+        self._buffered = 0
+        _write_meta(self.directory, self.columns, self._flushed)
+
+    def append(self, **row):
+        """Record one step, with a value for every column."""
+        if row.keys() != self._buffer.keys():
+            raise KeyError(f"Expected columns {list(self._buffer)}, got {list(row)}")
+        for name, value in row.items():
+            self._buffer[name][self._buffered] = value
+        self._buffered += 1
+        if self._buffered == self.chunk:
+            self.flush()
+
+    def extend(self, **cols):
+        """Record a block of steps, with an array for every column."""
+        if cols.keys() != self._buffer.keys():
+            raise KeyError(f"Expected columns {list(self._buffer)}, got {list(cols)}")
+        n = len(next(iter(cols.values())))
+        i = 0
+        while i < n:
+            m = min(self.chunk - self._buffered, n - i)
+            for name, values in cols.items():
+                self._buffer[name][self._buffered : self._buffered + m] = values[
+                    i : i + m
+                ]
+            self._buffered += m
+            i += m
+            if self._buffered == self.chunk:
+                self.flush()
+
+    def trim(self):
+        """Flush everything recorded, at the end of a run."""
+        self.flush()
+
+
+class Trajectory:
+    """Columns written by ``TrajectoryWriter``, memory-mapped read-only."""
+
+    def __init__(self, directory: "str | os.PathLike"):
+        self.directory = pathlib.Path(directory)
+        with open(self.directory / META_FILE) as f:
+            meta = json.load(f)
+        self.columns = {
+            name: np.dtype(dtype) for name, dtype in meta["columns"].items()
+        }
+        self._len = meta["length"]
+
+    def __len__(self) -> int:
+        return self._len
+
+    def __contains__(self, name: str) -> bool:
+        return name in self.columns
+
+    def __getitem__(self, name: str) -> np.ndarray:
+        dtype = self.columns[name]
+        if not self._len:
+            return np.empty(0, dtype)
+        return np.memmap(
+            _column_file(self.directory, name), dtype, mode="r", shape=(self._len,)
+        )
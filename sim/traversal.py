@@ -1,45 +1,53 @@
-from paths import Location
-from utils import Model, snap_angle_range, SECS_PER_DAY
+import pathlib
+
+import numpy as np
+
+from .paths import Location
+from .zones import ZoneIndex
+from .utils import Model, snap_angle_range, SECS_PER_DAY
 
 
 class Traversal(Model):
+    INPUTS = ("speed.speed", "term.longitude", "dt")
+    OUTPUTS = ("dist", "pos", "bearing", "alpha", "phi")
+
     def __init__(self, sim):
         super().__init__(sim)
         self.dist = 0
-        self.pos = sim.path.points[0]
-        self._compute()
+        self._locate()
+        self._orient()
 
     def step(self, dt: float):
-        self.dist += self.sim.models.speed.speed * 1e-3 * dt
-        self.pos = self.sim.path.point_at_dist(self.dist)
-        self._compute()
+        speed = self.sim.models.speed.speed
+        self.dist += speed * 1e-3 * dt
+        # Parked, so still at the same point, but the terminator moves on
+        if speed:
+            self._locate()
+        self._orient()
 
-    def _compute(self):
+    def _locate(self):
+        self.pos, self.bearing = self.sim.path.point_and_bearing_at_dist(self.dist)
+
+    def _orient(self):
         self.alpha = Location.subtract_longitudes(
             self.pos.lon, self.sim.models.term.longitude
         )
         self.phi = snap_angle_range(90 - self.alpha)
 
-        # Compute which direction we're headed
-        slighty_ahead = self.sim.path.point_at_dist(self.dist + 0.1)
-        self.bearing = self.pos.bearing_to(slighty_ahead)
-
 
 class SpeedControl(Model):
+    INPUTS = ("surf_temp.surface_temp", "t", "dt")
+    LAGGED = ("traverse.dist",)
+    OUTPUTS = ("speed", "temp_max", "t_excess")
+
     MAX_SPEED = 1.6  # [m/s]
 
+    TEMP_MAX = 55  # [degC]
+    TEMP_MAX_COLD = 65  # [degC], Allowed in and on the way into COLD_ZONES
     TEMP_P_RANGE = 5  # [degC]
-    TOO_COLD_DISTS = [  # [km]
-        # fmt: off
-        (  500,   650),
-        ( 1700,  1950),
-        ( 4800,  5000),
-        ( 6150,  6400),
-        ( 9100,  9350),
-        ( 9750,  9900),
-        (13700, 14200),
-        # fmt: on
-    ]
+    COLD_ZONES = ZoneIndex.load(
+        pathlib.Path(__file__).parent / "data" / "cold_zones.csv", lead_in=2
+    )
 
     def __init__(self, sim):
         super().__init__(sim)
@@ -48,23 +56,36 @@ class SpeedControl(Model):
         self.t_excess = 0
 
     def step(self, dt: float):
-        # Simple proportional speed control based on surface temp
         self.temp_max = self.target_temp_max()
-        temp_P_min = self.temp_max - self.TEMP_P_RANGE
-        surf_temp = self.sim.models.surf_temp.surface_temp
-        if surf_temp > self.temp_max:
-            self.speed = 0
-        elif surf_temp > temp_P_min:
-            gain = 1 - (surf_temp - temp_P_min) / self.TEMP_P_RANGE
-            self.speed = gain * self.MAX_SPEED
+        if self.sim.schedule is None:
+            surf_temp = self.sim.models.surf_temp.surface_temp
+            self.speed = self.speed_from_temp(surf_temp, self.temp_max)
         else:
-            self.speed = self.MAX_SPEED
+            self.speed = self.sim.schedule.tracking_speed(
+                self.sim.models.traverse.dist, self.sim.t, dt
+            )
         self.t_excess = (1 - self.speed / self.MAX_SPEED) * dt
 
     def target_temp_max(self):
-        d = self.sim.models.traverse.dist
-        for d_start, d_end in self.TOO_COLD_DISTS:
-            start_before = (d_end - d_start) * 2
-            if (d_start - start_before) < d < d_end:
-                return 65
-        return 55
+        in_cold = self.COLD_ZONES.contains(self.sim.models.traverse.dist)
+        return self.TEMP_MAX_COLD if in_cold else self.TEMP_MAX
+
+    @classmethod
+    def speed_from_temp(cls, surf_temp: np.ndarray, temp_max: np.ndarray):
+        """Simple proportional speed control based on surface temp."""
+        temp_P_min = temp_max - cls.TEMP_P_RANGE
+        gain = 1 - (surf_temp - temp_P_min) / cls.TEMP_P_RANGE
+        return np.clip(gain, 0, 1) * cls.MAX_SPEED
+
+    @classmethod
+    def speed_slope_from_temp(cls, surf_temp: np.ndarray, temp_max: np.ndarray):
+        """Rate of change [m/s/degC] of ``speed_from_temp`` with surface temp."""
+        temp_P_min = temp_max - cls.TEMP_P_RANGE
+        gain = 1 - (surf_temp - temp_P_min) / cls.TEMP_P_RANGE
+        return np.where((0 < gain) & (gain < 1), -cls.MAX_SPEED / cls.TEMP_P_RANGE, 0)
+
+    @classmethod
+    def target_temps_max(cls, dists: np.ndarray) -> np.ndarray:
+        """Max allowed surface temp at distance(s) along the path [km]."""
+        in_cold = cls.COLD_ZONES.contains_all(dists)
+        return np.where(in_cold, cls.TEMP_MAX_COLD, cls.TEMP_MAX)
@@ -6,6 +6,13 @@ SECS_PER_DAY = 24 * 60 * 60  # [s/day]
 
 
 class Model(ABC):
+    # What step() reads, as "<model>.<attr>", "t" or "dt", and the attributes
+    # it sets. LAGGED inputs are read as they were at the end of the previous
+    # step, so their models step after this one.
+    INPUTS: tuple[str, ...] = ()
+    LAGGED: tuple[str, ...] = ()
+    OUTPUTS: tuple[str, ...] = ()
+
     def __init__(self, sim):
         self.sim = sim
 
@@ -20,7 +27,33 @@ class Plane:
         self.normal = np.array(normal) / np.linalg.norm(normal)
 
     def projected_area(self, view_from: np.ndarray) -> float:
-        return max(self.area * np.dot(self.normal, view_from), 0)
+        return np.maximum(self.area * np.dot(view_from, self.normal), 0)
+
+
+class PlaneSet:
+    """Many planes stored as arrays of normals (N, 3) and areas (N,)."""
+
+    def __init__(self, areas: np.ndarray, normals: np.ndarray):
+        normals = np.asarray(normals, dtype=np.float64)
+        self.areas = np.asarray(areas, dtype=np.float64)
+        self.normals = normals / np.linalg.norm(normals, axis=-1, keepdims=True)
+        # Scaled normals so the projected areas are a single matrix multiply
+        self._area_normals = self.areas[:, np.newaxis] * self.normals
+
+    @classmethod
+    def from_planes(cls, planes: list[Plane]) -> "PlaneSet":
+        return cls([p.area for p in planes], [p.normal for p in planes])
+
+    def __len__(self) -> int:
+        return len(self.areas)
+
+    def projected_areas(self, view_from: np.ndarray) -> np.ndarray:
+        """Projected area of each plane, (..., N) for view vector(s) (..., 3)."""
+        return np.maximum(view_from @ self._area_normals.T, 0)
+
+    def illuminated_area(self, view_from: np.ndarray) -> np.ndarray:
+        """Total projected area for one (3,) or a batch (T, 3) of view vectors."""
+        return self.projected_areas(view_from).sum(axis=-1)
 
 
 def degC_to_K(degC: float) -> float:
@@ -32,8 +65,13 @@ def K_to_degC(K: float) -> float:
 
 
 def snap_angle_range(deg: float) -> float:
-    deg = deg % 360
-    deg = (deg + 360) % 360
-    if deg > 180:
-        deg -= 360
-    return deg
+    """Wrap angle(s) into (-180, 180] degrees."""
+    # Arrays are mostly in range already, and floor is slow over big ones
+    if (
+        isinstance(deg, np.ndarray)
+        and deg.size
+        and -180 < deg.min() <= deg.max() <= 180
+    ):
+        return deg
+    deg = deg - 360 * np.floor(deg / 360)
+    return deg - 360 * (deg > 180)
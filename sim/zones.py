@@ -0,0 +1,54 @@
+import bisect
+
+import numpy as np
+
+
+class ZoneIndex:
+    """Sorted, merged index of open distance intervals along a path.
+
+    Each zone (start, end) [km] is extended backwards by a lead-in of
+    ``lead_in`` times its length, then overlapping zones are merged. Lookups
+    are a bisection of the flat array of interval bounds, so their cost
+    barely grows with the number of zones.
+    """
+
+    def __init__(self, zones: np.ndarray, lead_in: float = 2):
+        zones = np.asarray(zones, np.float64).reshape(-1, 2)
+        self.zones = zones
+        self.lead_in = lead_in
+
+        starts = zones[:, 0] - lead_in * (zones[:, 1] - zones[:, 0])
+        ends = zones[:, 1]
+        order = np.argsort(starts)
+        merged = []
+        for start, end in zip(starts[order].tolist(), ends[order].tolist()):
+            # Open intervals that only touch stay apart
+            if merged and start < merged[-1][1]:
+                merged[-1][1] = max(merged[-1][1], end)
+            else:
+                merged.append([start, end])
+        # Flat [start_0, end_0, start_1, end_1, ...]
+        self.bounds = np.array(merged, np.float64).reshape(-1)
+        self._bounds = self.bounds.tolist()
+
+    def __len__(self) -> int:
+        return len(self.bounds) // 2
+
+    @classmethod
+    def load(cls, file: str, lead_in: float = 2) -> "ZoneIndex":
+        """Zones from a file of comma separated start, end [km] rows."""
+        return cls(np.loadtxt(file, delimiter=",", ndmin=2), lead_in)
+
+    def contains(self, dist: float) -> bool:
+        """Whether a single distance [km] is inside any zone or its lead-in."""
+        k = bisect.bisect_right(self._bounds, dist)
+        return k % 2 == 1 and dist > self._bounds[k - 1]
+
+    def contains_all(self, dists: np.ndarray) -> np.ndarray:
+        """Vectorized ``contains`` over an array of distances [km]."""
+        dists = np.asarray(dists)
+        if not len(self):
+            return np.zeros(dists.shape, bool)
+        k = np.searchsorted(self.bounds, dists, side="right")
+        inside = k % 2 == 1
+        return inside & (dists > self.bounds[np.maximum(k - 1, 0)])
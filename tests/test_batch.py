@@ -0,0 +1,36 @@
+import numpy as np
+import pytest
+
+from sim.simulation import Simulation
+
+DT = 3600  # [s], Coarse, to keep the loop runs quick
+
+
+@pytest.fixture(scope="module")
+def loop_rec():
+    return Simulation(dt=DT).run()
+
+
+@pytest.fixture(scope="module")
+def batch_rec():
+    return Simulation(dt=DT).run(engine="batch", thermal=True)
+
+
+def test_batch_matches_loop(loop_rec, batch_rec):
+    assert len(batch_rec) == len(loop_rec)
+    tols = {
+        "t": 0,
+        "dist": 1e-6,  # [km]
+        "lat": 1e-6,
+        "lon": 1e-6,
+        "speed": 1e-5,
+        "surf_temp": 1e-3,
+        "sun_elevation": 1e-4,
+        "power_gen": 1e-2,
+        "body_temp": 1e-3,
+        "panel_temp": 1e-3,
+    }
+    for name, tol in tols.items():
+        np.testing.assert_allclose(
+            batch_rec[name], loop_rec[name], rtol=0, atol=tol, err_msg=name
+        )
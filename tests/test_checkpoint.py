@@ -0,0 +1,63 @@
+import numpy as np
+import pytest
+
+from sim import checkpoint
+from sim.simulation import Simulation
+
+DT = 3600  # [s]
+
+
+@pytest.fixture(scope="module")
+def full_rec():
+    return Simulation(dt=DT).run()
+
+
+def assert_same_run(rec, expected):
+    assert len(rec) == len(expected)
+    for name in expected.columns:
+        np.testing.assert_array_equal(rec[name], expected[name], err_msg=name)
+
+
+def test_resume_matches_uninterrupted_run(full_rec, tmp_path):
+    sim = Simulation(dt=DT)
+    sim.run(until=5000)
+    checkpoint.save(sim, tmp_path / "at_5000km.npz")
+    resumed = checkpoint.load(tmp_path / "at_5000km.npz")
+    assert_same_run(resumed.run(), full_rec)
+
+
+def test_fork_is_independent(full_rec):
+    sim = Simulation(dt=DT)
+    sim.run(until=5000)
+    forked = checkpoint.fork(sim)
+    assert_same_run(forked.run(), full_rec)
+    assert_same_run(sim.run(), full_rec)
+
+
+def test_running_again_carries_on(full_rec):
+    sim = Simulation(dt=DT)
+    for until in (2000, 8000, 15000):
+        sim.run(until=until)
+    assert_same_run(sim.run(), full_rec)
+
+
+def test_batch_refuses_to_resume():
+    sim = Simulation(dt=DT)
+    sim.run(until=1000)
+    with pytest.raises(ValueError):
+        sim.run(engine="batch")
+
+
+def test_resuming_a_finished_run_records_nothing_more(full_rec, tmp_path):
+    sim = Simulation(dt=DT)
+    sim.run()
+    assert_same_run(sim.run(), full_rec)
+    checkpoint.save(sim, tmp_path / "finished.npz")
+    assert_same_run(checkpoint.load(tmp_path / "finished.npz").run(), full_rec)
+
+
+def test_batch_runs_cant_be_saved(tmp_path):
+    sim = Simulation(dt=DT)
+    sim.run(engine="batch")
+    with pytest.raises(ValueError):
+        checkpoint.save(sim, tmp_path / "batch.npz")
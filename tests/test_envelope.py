@@ -0,0 +1,43 @@
+import numpy as np
+
+from sim.envelope import envelope, steady_state
+from sim.power import Power
+
+
+def test_steady_state_defaults():
+    res = steady_state()
+    assert res.converged.all()
+    assert np.isfinite(res.body_temp) and np.isfinite(res.panel_temp)
+
+
+def test_envelope_defaults_the_flux():
+    env = envelope({"ground_temp": np.linspace(-50, 450, 5)})
+    assert env.body_temp.shape == (5,)
+    assert env.converged.all()
+
+
+def test_steady_state_at_default_conditions():
+    res = steady_state()
+    np.testing.assert_allclose(res.body_temp, 53.29, atol=0.01)
+    np.testing.assert_allclose(res.panel_temp, 277.09, atol=0.01)
+
+
+def test_envelope_grid_axes():
+    env = envelope(
+        {
+            "ground_temp": np.linspace(-50, 450, 10),
+            "solar_flux": np.linspace(Power.MIN_SOLAR_FLUX, Power.MAX_SOLAR_FLUX, 8),
+            "K_INTERFACE": np.linspace(0, 200, 3),
+        }
+    )
+    assert env.body_temp.shape == env.panel_temp.shape == (10, 8, 3)
+    assert env.converged.all()
+    # Hotter ground and more sunlight both warm the body
+    assert (np.diff(env.body_temp, axis=0) > 0).all()
+    assert (np.diff(env.body_temp, axis=1) > 0).all()
+    point = steady_state(
+        ground_temp=env.grid["ground_temp"][3],
+        solar_flux=env.grid["solar_flux"][5],
+        K_INTERFACE=env.grid["K_INTERFACE"][1],
+    )
+    np.testing.assert_allclose(env.body_temp[3, 5, 1], point.body_temp, atol=1e-6)
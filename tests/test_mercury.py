@@ -0,0 +1,49 @@
+import numpy as np
+import pytest
+
+from sim.mercury import (
+    Orbit,
+    PHI_TABLE_ERROR,
+    R_AU_MAX,
+    R_AU_MIN,
+    SurfaceThermal,
+    phi_from_surface_temp,
+    surface_temp,
+    surface_temp_slope,
+)
+
+
+def test_orbit_stays_between_perihelion_and_aphelion():
+    r = Orbit.sun_distance(np.linspace(0, 2 * Orbit.PERIOD, 1001))
+    a, e = Orbit.SEMI_MAJOR_AXIS, Orbit.ECCENTRICITY
+    assert r.min() >= a * (1 - e) - 1e-6
+    assert r.max() <= a * (1 + e) + 1e-6
+
+
+def test_legacy_sun_distances_are_accepted(monkeypatch):
+    for r in (0.3075, 0.4667):
+        monkeypatch.setattr(SurfaceThermal, "R_AU", r)
+        assert np.isfinite(surface_temp(30.0, SurfaceThermal.sun_distance(0)))
+
+
+@pytest.mark.parametrize("r", [R_AU_MIN - 0.01, R_AU_MAX + 0.01])
+def test_sun_distance_outside_orbit_raises(r):
+    with pytest.raises(ValueError):
+        surface_temp(30.0, r)
+
+
+def test_surface_temp_slope_matches_finite_difference():
+    phi = np.linspace(-89, 89, 357)
+    r = 0.4
+    h = 1e-6
+    fd = (surface_temp(phi + h, r) - surface_temp(phi - h, r)) / (2 * h)
+    slope = surface_temp_slope(phi, surface_temp(phi, r))
+    np.testing.assert_allclose(slope, fd, rtol=1e-5, atol=1e-5)
+    assert (surface_temp_slope(np.array([90.0, 120.0, -150.0]), 0) == 0).all()
+
+
+def test_phi_from_surface_temp_inverts_surface_temp():
+    phi = np.linspace(0, 89.9, 500)
+    for r in (R_AU_MIN, 0.4, R_AU_MAX):
+        found = phi_from_surface_temp(surface_temp(phi, r), r)
+        np.testing.assert_allclose(found, phi, atol=PHI_TABLE_ERROR)
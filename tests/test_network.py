@@ -0,0 +1,41 @@
+import numpy as np
+import pytest
+
+from sim import envelope
+from sim.mercury import Sun
+from sim.network import meta_network
+from sim.utils import K_to_degC
+
+
+def test_meta_network_defaults():
+    temps = meta_network(ground_temp=50).steady_state()
+    np.testing.assert_allclose(temps["body"], 53.29, atol=0.01)
+    np.testing.assert_allclose(temps["panel"], 277.09, atol=0.01)
+
+
+@pytest.mark.parametrize(
+    "inputs",
+    [
+        {"ground_temp": -50, "solar_flux": 6278},
+        {"ground_temp": 300, "solar_flux": 10000, "K_INTERFACE": 50},
+        {
+            "ground_temp": 120,
+            "solar_flux": 14462,
+            "sun_vec": Sun.sun_vectors(30.0, 10.0),
+            "K_INTERFACE": 200,
+        },
+    ],
+)
+def test_meta_network_matches_envelope(inputs):
+    temps = meta_network(**inputs).steady_state()
+    expected = envelope.steady_state(**inputs)
+    np.testing.assert_allclose(temps["body"], expected.body_temp, atol=1e-6)
+    np.testing.assert_allclose(temps["panel"], expected.panel_temp, atol=1e-6)
+
+
+def test_transient_settles_to_steady_state():
+    net = meta_network(ground_temp=100)
+    steady = net.steady_state()
+    fixed_temps = np.tile(K_to_degC(net.fixed_temps), (2000, 1))
+    temps = net.transient(600, net.heat, fixed_temps, {"body": 20, "panel": 20})
+    np.testing.assert_allclose(temps[-1, net.index["body"]], steady["body"], atol=1e-3)
@@ -0,0 +1,16 @@
+import numpy as np
+import pytest
+
+from sim.raster import TiledRaster
+
+Image = pytest.importorskip("PIL.Image")
+
+
+def test_convert_image_keeps_pixel_limit(tmp_path, monkeypatch):
+    # A limit this image is well over, which converting shouldn't trip or change
+    monkeypatch.setattr(Image, "MAX_IMAGE_PIXELS", 100)
+    pixels = np.random.default_rng(0).integers(0, 256, (300, 400, 3), np.uint8)
+    Image.fromarray(pixels).save(tmp_path / "map.png")
+    raster = TiledRaster.convert(tmp_path / "map.png", tmp_path / "tiles", tile=128)
+    assert Image.MAX_IMAGE_PIXELS == 100
+    np.testing.assert_array_equal(raster.read(0, 0, 400, 300), pixels)
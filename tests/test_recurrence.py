@@ -0,0 +1,29 @@
+import numpy as np
+import pytest
+
+from sim.recurrence import solve_linear_recurrence, solve_coupled_recurrence
+
+
+def loop(a, b):
+    x = np.empty_like(b)
+    x[..., 0] = b[..., 0]
+    for j in range(1, b.shape[-1]):
+        x[..., j] = a[..., j] @ x[..., j - 1] if a.ndim == 3 else a[j] * x[j - 1]
+        x[..., j] += b[..., j]
+    return x
+
+
+# Near 1, as in the speed feedback, and damped, as in the thermal steps
+@pytest.mark.parametrize("scale", [1e-3, 0.5])
+def test_linear_matches_loop(scale):
+    rng = np.random.default_rng(0)
+    a = 1 - scale * rng.uniform(0, 1, 2000)
+    b = rng.normal(size=2000)
+    np.testing.assert_allclose(solve_linear_recurrence(a, b), loop(a, b), atol=1e-12)
+
+
+def test_coupled_matches_loop():
+    rng = np.random.default_rng(0)
+    a = 0.4 * rng.uniform(-1, 1, (2, 2, 500))
+    b = rng.normal(size=(2, 500))
+    np.testing.assert_allclose(solve_coupled_recurrence(a, b), loop(a, b), atol=1e-12)
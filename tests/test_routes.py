@@ -0,0 +1,31 @@
+import pytest
+
+from sim.routes import RouteGraph, _route_exposure
+
+
+@pytest.fixture(scope="module")
+def graph():
+    return RouteGraph.load()
+
+
+@pytest.fixture(scope="module")
+def ranked(graph):
+    return graph.search(graph.nearest_junction((288, 379)))
+
+
+def test_routes_are_feasible_and_ranked(graph, ranked):
+    assert ranked
+    for route in ranked:
+        assert route.exposure <= graph.band
+        assert len(set(route.names)) == len(route.names)
+    keys = [(-route.length, route.required_speed) for route in ranked]
+    assert keys == sorted(keys)
+
+
+def test_exposure_only_grows_along_a_route(ranked):
+    for route in ranked:
+        exposures = [
+            _route_exposure(route.segments[:k])
+            for k in range(1, len(route.segments) + 1)
+        ]
+        assert exposures == sorted(exposures)
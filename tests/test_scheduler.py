@@ -0,0 +1,91 @@
+from types import SimpleNamespace
+
+import pytest
+
+from sim.scheduler import Scheduler
+from sim.simulation import Simulation
+from sim.utils import Model
+
+
+def make_model(name, inputs=(), lagged=(), outputs=(), log=None):
+    cls = type(
+        name,
+        (Model,),
+        {
+            "INPUTS": inputs,
+            "LAGGED": lagged,
+            "OUTPUTS": outputs,
+            "step": lambda self, dt: log.append(name),
+        },
+    )
+    return cls(None)
+
+
+def make_sim(**models):
+    return SimpleNamespace(models=SimpleNamespace(**models), t=0, dt=1)
+
+
+def test_simulation_order():
+    sim = Simulation()
+    assert sim.scheduler.order == [
+        "term",
+        "surf_temp",
+        "speed",
+        "traverse",
+        "sun",
+        "power",
+        "thermal",
+    ]
+
+
+def test_inputs_step_first_and_lagged_after():
+    log = []
+    sim = make_sim(
+        c=make_model("c", inputs=("b.y",), outputs=("z",), log=log),
+        b=make_model("b", inputs=("a.x",), lagged=("c.z",), outputs=("y",), log=log),
+        a=make_model("a", outputs=("x",), log=log),
+    )
+    scheduler = Scheduler(sim)
+    assert scheduler.order == ["a", "b", "c"]
+    scheduler.step(1)
+    assert log == ["a", "b", "c"]
+
+
+def test_ties_keep_added_order():
+    sim = make_sim(
+        b=make_model("b", inputs=("t",)),
+        a=make_model("a", inputs=("dt",)),
+    )
+    assert Scheduler(sim).order == ["b", "a"]
+
+
+def test_cycle_raises():
+    sim = make_sim(
+        a=make_model("a", inputs=("b.y",), outputs=("x",)),
+        b=make_model("b", inputs=("a.x",), outputs=("y",)),
+    )
+    with pytest.raises(ValueError, match="cycle"):
+        Scheduler(sim)
+
+
+@pytest.mark.parametrize("value", ["nope.x", "a.nope"])
+def test_unknown_inputs_raise(value):
+    sim = make_sim(
+        a=make_model("a", outputs=("x",)),
+        b=make_model("b", inputs=(value,)),
+    )
+    with pytest.raises(ValueError):
+        Scheduler(sim)
+
+
+def test_profiler_sees_every_model():
+    sim = Simulation()
+    sim.run(profile=True, until=500)
+    assert set(sim.profiler.summary()) == set(sim.scheduler.order) | {"record"}
+
+
+def test_profiler_rows_in_step_order():
+    sim = Simulation()
+    sim.run(profile=True, until=500)
+    phases = [key.split(".")[1] for key in sim.profiler.flat() if key.endswith("calls")]
+    assert phases == ["record", *sim.scheduler.order]
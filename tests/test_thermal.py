@@ -0,0 +1,39 @@
+import numpy as np
+
+from sim.mercury import Sun
+from sim.simulation import Simulation
+from sim.thermal import LumpedThermal
+
+DT = 600  # [s]
+
+
+def inputs(n=5000):
+    t = np.arange(n) * DT
+    # Sun going round the sky once a day, and a ground temp to match
+    azimuth = np.rad2deg(2 * np.pi * t / 86400)
+    elevation = 5 + 3 * np.sin(2 * np.pi * t / 86400)
+    ground_temps = 100 + 50 * np.sin(2 * np.pi * t / 86400)
+    return Sun.sun_vectors(azimuth, elevation), ground_temps, t
+
+
+def test_integrate_starts_at_initial_temp():
+    sun_vecs, ground_temps, t = inputs(10)
+    body, panel = LumpedThermal.integrate(sun_vecs, ground_temps, DT, t)
+    assert body[0] == panel[0] == LumpedThermal.INITIAL_TEMP
+
+
+def test_integrate_carries_on_from_initial():
+    sun_vecs, ground_temps, t = inputs()
+    body, panel = LumpedThermal.integrate(sun_vecs, ground_temps, DT, t)
+    k = 1234
+    body_rest, panel_rest = LumpedThermal.integrate(
+        sun_vecs[k:], ground_temps[k:], DT, t[k:], initial=(body[k - 1], panel[k - 1])
+    )
+    np.testing.assert_allclose(body_rest, body[k:], rtol=0, atol=1e-8)
+    np.testing.assert_allclose(panel_rest, panel[k:], rtol=0, atol=1e-8)
+
+
+def test_batch_temps_are_opt_in():
+    rec = Simulation(dt=3600).run(engine="batch")
+    assert np.isnan(rec["body_temp"]).all()
+    assert np.isnan(rec["panel_temp"]).all()
@@ -0,0 +1,45 @@
+import numpy as np
+
+from sim import batch, checkpoint
+from sim.main import main
+from sim.simulation import Simulation
+from sim.trajectory import Trajectory, TrajectoryWriter
+
+DT = 3600  # [s]
+
+
+def assert_same_columns(traj, rec, **tols):
+    assert len(traj) == len(rec)
+    for name in rec.columns:
+        np.testing.assert_allclose(traj[name], rec[name], err_msg=name, **tols)
+
+
+def test_writer_matches_recorder(tmp_path):
+    rec = Simulation(dt=DT).run()
+    Simulation(dt=DT, rec=TrajectoryWriter(tmp_path, chunk=256)).run()
+    assert_same_columns(Trajectory(tmp_path), rec, rtol=0, atol=0)
+
+
+def test_batch_streams_in_blocks(tmp_path, monkeypatch):
+    rec = Simulation(dt=DT).run(engine="batch", thermal=True)
+    monkeypatch.setattr(batch, "RECORD_BLOCK", 1000)
+    sim = Simulation(dt=DT, rec=TrajectoryWriter(tmp_path, chunk=256))
+    sim.run(engine="batch", thermal=True)
+    assert_same_columns(Trajectory(tmp_path), rec, rtol=1e-6, atol=1e-4)
+
+
+def test_stream_after_resume_keeps_restored_steps(tmp_path):
+    rec = Simulation(dt=DT).run()
+    sim = Simulation(dt=DT)
+    sim.run(until=5000)
+    checkpoint.save(sim, tmp_path / "at_5000km.npz")
+    main(
+        [
+            "run",
+            "--resume",
+            str(tmp_path / "at_5000km.npz"),
+            "--stream",
+            str(tmp_path / "stream"),
+        ]
+    )
+    assert_same_columns(Trajectory(tmp_path / "stream"), rec, rtol=0, atol=0)